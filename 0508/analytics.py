@@ -0,0 +1,1074 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from collections import Counter, defaultdict, namedtuple
+from contextlib import closing
+
+from tabulate import tabulate
+
+from db import connect
+
+# One entry per ProblemStatement.md problem. Queries take named parameters;
+# :as_of is "now" for every relative date window and defaults to the newest
+# order, so the reports also work on generated or old data. Revenue counts
+# every order's total_amount.
+Problem = namedtuple('Problem', 'number name title sql')
+
+PROBLEMS = {}
+
+DEFAULT_PARAMS = {
+    'limit': 10,
+    'min_orders': 3,
+    'per_category': 3,
+    'poor_rating': 2,
+    'horizon_months': 12,
+    'vip_score': 80,
+    'min_support': 0.01,
+    'min_confidence': 0.30,
+}
+
+
+def problem(number, name, title, sql):
+    PROBLEMS[number] = Problem(number, name, title, sql)
+
+
+problem(1, 'customer_lifetime_value', 'Customer Lifetime Value Analysis', '''
+WITH customer AS (
+    SELECT user_id, COUNT(*) AS orders, SUM(total_amount) AS lifetime_value,
+           MIN(order_date) AS first_order, MAX(order_date) AS last_order
+    FROM orders
+    GROUP BY user_id
+    HAVING COUNT(*) > :min_orders
+)
+SELECT c.user_id, u.username, c.orders, ROUND(c.lifetime_value, 2) AS lifetime_value,
+       ROUND(c.lifetime_value / c.orders, 2) AS avg_order_value,
+       ROUND(julianday(c.last_order) - julianday(c.first_order), 1) AS days_first_to_last
+FROM customer c
+JOIN users u ON u.user_id = c.user_id
+ORDER BY c.lifetime_value DESC
+LIMIT :limit
+''')
+
+problem(2, 'product_performance', 'Product Performance with Category Hierarchy', '''
+WITH recent AS (
+    SELECT DISTINCT oi.product_id
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    WHERE o.order_date >= datetime(:as_of, '-6 months')
+),
+sales AS (
+    SELECT oi.product_id, SUM(oi.quantity) AS units_sold, SUM(oi.total_price) AS revenue
+    FROM recent rp
+    JOIN order_items oi ON oi.product_id = rp.product_id
+    GROUP BY oi.product_id
+)
+SELECT p.product_id, p.product_name,
+       COALESCE(parent.category_name || ' > ', '') || c.category_name AS category_path,
+       s.units_sold, ROUND(s.revenue, 2) AS revenue,
+       (SELECT ROUND(AVG(rating), 2) FROM reviews r WHERE r.product_id = p.product_id) AS avg_rating
+FROM sales s
+JOIN products p ON p.product_id = s.product_id
+JOIN categories c ON c.category_id = p.category_id
+LEFT JOIN categories parent ON parent.category_id = c.parent_category_id
+ORDER BY s.revenue DESC, p.product_id
+''')
+
+problem(3, 'monthly_revenue_trend', 'Monthly Revenue Trend with Growth Rate', '''
+WITH monthly AS (
+    SELECT strftime('%Y-%m', order_date) AS month, SUM(total_amount) AS revenue,
+           COUNT(*) AS orders, COUNT(DISTINCT user_id) AS customers
+    FROM orders
+    WHERE order_date >= date(:as_of, 'start of month', '-11 months')
+      AND order_date < date(:as_of, 'start of month', '+1 month')
+    GROUP BY month
+)
+SELECT month, ROUND(revenue, 2) AS revenue, customers, orders,
+       ROUND(revenue / orders, 2) AS avg_order_value,
+       ROUND(100.0 * (revenue - LAG(revenue) OVER w) / LAG(revenue) OVER w, 2) AS growth_pct,
+       ROUND(AVG(revenue) OVER (w ROWS 2 PRECEDING), 2) AS moving_avg_3m
+FROM monthly
+WINDOW w AS (ORDER BY month)
+ORDER BY month
+''')
+
+problem(4, 'customer_segments', 'Customer Segmentation Based on Purchase Behavior', '''
+WITH customer AS (
+    SELECT user_id, SUM(total_amount) AS spent, COUNT(*) AS orders,
+           julianday(:as_of) - julianday(MAX(order_date)) AS recency_days
+    FROM orders
+    GROUP BY user_id
+),
+ranked AS (
+    SELECT *, NTILE(3) OVER (ORDER BY spent DESC, orders DESC) AS value_tier
+    FROM customer
+),
+segmented AS (
+    SELECT CASE
+               WHEN recency_days > 90 THEN 'At Risk'
+               WHEN value_tier = 1 THEN 'High Value'
+               WHEN value_tier = 2 THEN 'Medium Value'
+               ELSE 'Low Value'
+           END AS segment, spent, orders
+    FROM ranked
+)
+SELECT segment, COUNT(*) AS customers,
+       ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS pct_customers,
+       ROUND(AVG(spent), 2) AS avg_spent, ROUND(AVG(orders), 2) AS avg_orders
+FROM segmented
+GROUP BY segment
+ORDER BY customers DESC, segment
+''')
+
+problem(5, 'co_purchases', 'Product Recommendation Based on Co-purchases', '''
+WITH pairs AS (
+    SELECT a.product_id, b.product_id AS other_product_id,
+           COUNT(DISTINCT a.order_id) AS together
+    FROM order_items a
+    JOIN order_items b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+    GROUP BY a.product_id, b.product_id
+),
+ranked AS (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id
+                                 ORDER BY together DESC, other_product_id) AS rank
+    FROM pairs
+)
+SELECT r.product_id, r.rank, r.other_product_id, r.together,
+       ROUND(100.0 * r.together / (SELECT COUNT(DISTINCT order_id) FROM order_items oi
+                                   WHERE oi.product_id = r.product_id), 2) AS co_purchase_pct
+FROM ranked r
+WHERE r.rank <= 3
+ORDER BY r.product_id, r.rank
+''')
+
+problem(6, 'inventory_alerts', 'Inventory Management Alert System', '''
+WITH recent AS (
+    SELECT oi.product_id, SUM(oi.quantity) AS sold
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    WHERE o.order_date >= datetime(:as_of, '-30 days')
+    GROUP BY oi.product_id
+)
+SELECT p.product_id, p.product_name, p.stock_quantity, p.min_stock_level,
+       COALESCE(r.sold, 0) AS sold_30d,
+       p.stock_quantity < p.min_stock_level AS below_minimum,
+       r.sold IS NULL AS no_recent_sales,
+       COALESCE(r.sold > 0.5 * p.stock_quantity, 0) AS high_velocity
+FROM products p
+LEFT JOIN recent r ON r.product_id = p.product_id
+WHERE p.stock_quantity < p.min_stock_level
+   OR r.sold IS NULL
+   OR r.sold > 0.5 * p.stock_quantity
+ORDER BY below_minimum DESC, high_velocity DESC, p.product_id
+''')
+
+problem(7, 'churn_risk', 'Customer Churn Analysis', '''
+WITH customer AS (
+    SELECT user_id, COUNT(*) AS orders, SUM(total_amount) AS total_value,
+           MIN(order_date) AS first_order, MAX(order_date) AS last_order
+    FROM orders
+    GROUP BY user_id
+    HAVING COUNT(*) >= 2 AND MAX(order_date) < datetime(:as_of, '-90 days')
+),
+scored AS (
+    SELECT *, (julianday(last_order) - julianday(first_order)) / (orders - 1) AS avg_days_between,
+           julianday(:as_of) - julianday(last_order) AS days_since_last
+    FROM customer
+)
+SELECT user_id, orders, ROUND(total_value, 2) AS total_value,
+       ROUND(avg_days_between, 1) AS avg_days_between,
+       ROUND(days_since_last, 1) AS days_since_last,
+       ROUND(days_since_last / MAX(avg_days_between, 1), 2) AS overdue_ratio,
+       RANK() OVER (ORDER BY days_since_last / MAX(avg_days_between, 1) DESC,
+                    total_value DESC) AS churn_rank
+FROM scored
+ORDER BY churn_rank
+LIMIT :limit
+''')
+
+problem(8, 'seasonality', 'Seasonal Sales Pattern Analysis', '''
+WITH quarterly AS (
+    SELECT p.category_id, strftime('%Y', o.order_date) AS year,
+           (CAST(strftime('%m', o.order_date) AS INTEGER) + 2) / 3 AS quarter,
+           SUM(oi.total_price) AS revenue
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    JOIN products p ON p.product_id = oi.product_id
+    WHERE o.order_date >= datetime(:as_of, '-2 years')
+    GROUP BY p.category_id, year, quarter
+),
+by_quarter AS (
+    SELECT category_id, quarter, AVG(revenue) AS avg_revenue
+    FROM quarterly
+    GROUP BY category_id, quarter
+),
+indexed AS (
+    SELECT category_id, quarter,
+           avg_revenue / AVG(avg_revenue) OVER (PARTITION BY category_id) AS seasonal_index
+    FROM by_quarter
+)
+SELECT c.category_name, i.quarter, ROUND(i.seasonal_index, 3) AS seasonal_index,
+       ROUND(MAX(i.seasonal_index) OVER (PARTITION BY i.category_id)
+             - MIN(i.seasonal_index) OVER (PARTITION BY i.category_id), 3) AS seasonality
+FROM indexed i
+JOIN categories c ON c.category_id = i.category_id
+ORDER BY seasonality DESC, c.category_name, i.quarter
+''')
+
+# Price/rating correlation uses sqrt(), which needs SQLite's math functions
+# (in the SQLite bundled with Python 3.11+).
+problem(9, 'review_analytics', 'Advanced Review Analytics', '''
+WITH rated AS (
+    SELECT p.category_id, p.price, r.rating, r.is_verified_purchase,
+           r.review_date >= datetime(:as_of, '-6 months') AS recent
+    FROM reviews r
+    JOIN products p ON p.product_id = r.product_id
+)
+SELECT c.category_name, COUNT(*) AS reviews, ROUND(AVG(rating), 2) AS avg_rating,
+       ROUND(AVG(CASE WHEN is_verified_purchase THEN rating END), 2) AS verified_avg,
+       ROUND(AVG(CASE WHEN NOT is_verified_purchase THEN rating END), 2) AS unverified_avg,
+       ROUND(AVG(CASE WHEN recent THEN rating END)
+             - AVG(CASE WHEN NOT recent THEN rating END), 2) AS recent_rating_change,
+       ROUND((AVG(price * rating) - AVG(price) * AVG(rating))
+             / NULLIF(sqrt((AVG(price * price) - AVG(price) * AVG(price))
+                           * (AVG(rating * rating) - AVG(rating) * AVG(rating))), 0), 3)
+           AS price_rating_correlation
+FROM rated
+JOIN categories c ON c.category_id = rated.category_id
+GROUP BY rated.category_id
+ORDER BY avg_rating DESC
+''')
+
+problem(10, 'purchase_journey', 'Customer Purchase Journey Analysis', '''
+WITH sequenced AS (
+    SELECT user_id, order_date, total_amount,
+           LAG(order_date) OVER w AS previous_date,
+           LAG(total_amount) OVER w AS previous_amount
+    FROM orders
+    WINDOW w AS (PARTITION BY user_id ORDER BY order_date, order_id)
+),
+customer AS (
+    SELECT user_id, COUNT(*) AS orders, MIN(order_date) AS first_order,
+           AVG(julianday(order_date) - julianday(previous_date)) AS avg_days_between,
+           SUM(total_amount > previous_amount) AS increases,
+           SUM(total_amount < previous_amount) AS decreases
+    FROM sequenced
+    GROUP BY user_id
+)
+SELECT c.user_id, c.orders,
+       ROUND(julianday(c.first_order) - julianday(u.registration_date), 1) AS days_to_first_order,
+       ROUND(c.avg_days_between, 1) AS avg_days_between,
+       CASE
+           WHEN c.orders < 2 THEN 'Single order'
+           WHEN c.increases > c.decreases THEN 'Increasing'
+           WHEN c.decreases > c.increases THEN 'Decreasing'
+           ELSE 'Stable'
+       END AS order_value_trend,
+       ROUND(AVG(julianday(c.first_order) - julianday(u.registration_date)) OVER (), 1)
+           AS overall_days_to_first_order,
+       ROUND(AVG(c.avg_days_between) OVER (), 1) AS overall_days_between
+FROM customer c
+JOIN users u ON u.user_id = c.user_id
+ORDER BY c.user_id
+''')
+
+# There is no price history table, so a price change is a sale whose unit
+# price differs from the product's previous sale.
+problem(11, 'price_change_impact', 'Dynamic Pricing Impact Analysis', '''
+WITH sales AS (
+    SELECT oi.product_id, o.order_date, o.user_id, oi.unit_price, oi.quantity, oi.total_price,
+           LAG(oi.unit_price) OVER (PARTITION BY oi.product_id
+                                    ORDER BY o.order_date, o.order_id) AS previous_price
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+),
+changes AS (
+    SELECT product_id, order_date AS changed_at, previous_price AS old_price,
+           unit_price AS new_price
+    FROM sales
+    WHERE previous_price <> unit_price
+)
+SELECT c.product_id, c.changed_at, c.old_price, c.new_price,
+       ROUND(100.0 * (c.new_price - c.old_price) / c.old_price, 2) AS price_change_pct,
+       SUM(CASE WHEN s.order_date < c.changed_at THEN s.quantity ELSE 0 END) AS units_before,
+       SUM(CASE WHEN s.order_date >= c.changed_at THEN s.quantity ELSE 0 END) AS units_after,
+       ROUND(SUM(CASE WHEN s.order_date < c.changed_at THEN s.total_price ELSE 0 END), 2)
+           AS revenue_before,
+       ROUND(SUM(CASE WHEN s.order_date >= c.changed_at THEN s.total_price ELSE 0 END), 2)
+           AS revenue_after,
+       COUNT(DISTINCT CASE WHEN s.order_date < c.changed_at THEN s.user_id END) AS customers_before,
+       COUNT(DISTINCT CASE WHEN s.order_date >= c.changed_at THEN s.user_id END) AS customers_after
+FROM changes c
+JOIN sales s ON s.product_id = c.product_id
+            AND s.order_date >= datetime(c.changed_at, '-30 days')
+            AND s.order_date < datetime(c.changed_at, '+30 days')
+GROUP BY c.product_id, c.changed_at
+ORDER BY c.product_id, c.changed_at
+''')
+
+problem(12, 'loyalty_effectiveness', 'Loyalty Program Effectiveness', '''
+WITH first_loyalty AS (
+    SELECT user_id, MIN(order_date) AS joined
+    FROM orders
+    WHERE loyalty_points_earned > 0 OR loyalty_points_used > 0
+    GROUP BY user_id
+),
+phased AS (
+    SELECT o.user_id, o.order_date, o.total_amount,
+           CASE
+               WHEN f.joined IS NULL THEN 'Never used loyalty'
+               WHEN o.order_date < f.joined THEN 'Before loyalty'
+               ELSE 'After loyalty'
+           END AS phase
+    FROM orders o
+    LEFT JOIN first_loyalty f ON f.user_id = o.user_id
+),
+customer AS (
+    SELECT user_id, phase, COUNT(*) AS orders, AVG(total_amount) AS avg_order_value,
+           (julianday(MAX(order_date)) - julianday(MIN(order_date))) / 30.44 AS active_months
+    FROM phased
+    GROUP BY user_id, phase
+)
+SELECT phase, COUNT(*) AS customers, ROUND(AVG(orders), 2) AS avg_orders,
+       ROUND(AVG(avg_order_value), 2) AS avg_order_value,
+       ROUND(AVG(orders / MAX(active_months, 1)), 3) AS orders_per_month,
+       ROUND(100.0 * AVG(orders > 1), 1) AS retention_pct
+FROM customer
+GROUP BY phase
+ORDER BY phase
+''')
+
+# Addresses end in "City, ST 12345"; military addresses ("FPO AE 12345")
+# have no comma and are grouped together. There is no marketing spend data,
+# so acquisition is reported as new customers rather than a cost.
+problem(13, 'geographic_sales', 'Geographic Sales Distribution', '''
+WITH located AS (
+    SELECT user_id, order_date, total_amount,
+           substr(shipping_address, instr(shipping_address, char(10)) + 1) AS last_line
+    FROM orders
+),
+regional AS (
+    SELECT user_id, order_date, total_amount,
+           CASE WHEN instr(last_line, ', ') > 0
+                THEN substr(last_line, instr(last_line, ', ') + 2, 2)
+                ELSE 'Military/Other' END AS region,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY order_date) AS nth_order
+    FROM located
+)
+SELECT region, ROUND(SUM(total_amount), 2) AS revenue, COUNT(*) AS orders,
+       ROUND(AVG(total_amount), 2) AS avg_order_value,
+       COUNT(DISTINCT user_id) AS customers,
+       SUM(nth_order = 1) AS new_customers,
+       RANK() OVER (ORDER BY SUM(total_amount) DESC) AS revenue_rank
+FROM regional
+GROUP BY region
+ORDER BY revenue_rank
+''')
+
+problem(14, 'category_cross_sell', 'Product Category Cross-sell Analysis', '''
+WITH order_categories AS MATERIALIZED (
+    SELECT DISTINCT oi.order_id, p.category_id
+    FROM order_items oi
+    JOIN products p ON p.product_id = oi.product_id
+),
+category_orders AS (
+    SELECT category_id, COUNT(*) AS orders
+    FROM order_categories
+    GROUP BY category_id
+),
+pairs AS (
+    SELECT a.category_id AS category_a, b.category_id AS category_b, COUNT(*) AS together
+    FROM order_categories a
+    JOIN order_categories b ON b.order_id = a.order_id AND b.category_id <> a.category_id
+    GROUP BY a.category_id, b.category_id
+)
+SELECT ca.category_name AS category_a, cb.category_name AS category_b, p.together,
+       ROUND(100.0 * p.together / co.orders, 2) AS probability_b_given_a_pct
+FROM pairs p
+JOIN category_orders co ON co.category_id = p.category_a
+JOIN categories ca ON ca.category_id = p.category_a
+JOIN categories cb ON cb.category_id = p.category_b
+ORDER BY ca.category_name, probability_b_given_a_pct DESC, cb.category_name
+''')
+
+problem(15, 'retention_cohorts', 'Customer Retention Cohort Analysis', '''
+WITH cohort AS (
+    SELECT user_id, strftime('%Y-%m', registration_date) AS cohort,
+           CAST(strftime('%Y', registration_date) AS INTEGER) * 12
+           + CAST(strftime('%m', registration_date) AS INTEGER) AS cohort_month
+    FROM users
+),
+activity AS (
+    SELECT DISTINCT o.user_id,
+           CAST(strftime('%Y', o.order_date) AS INTEGER) * 12
+           + CAST(strftime('%m', o.order_date) AS INTEGER) - c.cohort_month AS month_number
+    FROM orders o
+    JOIN cohort c ON c.user_id = o.user_id
+)
+SELECT c.cohort, COUNT(DISTINCT c.user_id) AS customers,
+       ROUND(100.0 * COUNT(DISTINCT CASE WHEN a.month_number = 1 THEN a.user_id END)
+             / COUNT(DISTINCT c.user_id), 1) AS month_1_pct,
+       ROUND(100.0 * COUNT(DISTINCT CASE WHEN a.month_number = 3 THEN a.user_id END)
+             / COUNT(DISTINCT c.user_id), 1) AS month_3_pct,
+       ROUND(100.0 * COUNT(DISTINCT CASE WHEN a.month_number = 6 THEN a.user_id END)
+             / COUNT(DISTINCT c.user_id), 1) AS month_6_pct,
+       ROUND(100.0 * COUNT(DISTINCT CASE WHEN a.month_number = 12 THEN a.user_id END)
+             / COUNT(DISTINCT c.user_id), 1) AS month_12_pct
+FROM cohort c
+LEFT JOIN activity a ON a.user_id = c.user_id
+WHERE c.cohort IS NOT NULL
+GROUP BY c.cohort
+ORDER BY c.cohort
+''')
+
+# The schema has no shipping method, so the shipping cost tier stands in for it.
+problem(16, 'fulfillment_performance', 'Order Fulfillment Performance', '''
+WITH banded AS (
+    SELECT *, CASE
+                  WHEN total_amount < 100 THEN 1
+                  WHEN total_amount < 500 THEN 2
+                  WHEN total_amount < 2000 THEN 3
+                  ELSE 4
+              END AS band
+    FROM orders
+)
+SELECT CASE band WHEN 1 THEN 'Under 100' WHEN 2 THEN '100-500'
+                 WHEN 3 THEN '500-2000' ELSE '2000+' END AS order_value,
+       shipping_cost AS shipping_tier, COUNT(*) AS orders,
+       ROUND(AVG(julianday(shipping_date) - julianday(order_date)), 2) AS processing_days,
+       ROUND(AVG(julianday(delivery_date) - julianday(shipping_date)), 2) AS shipping_days,
+       ROUND(AVG(julianday(delivery_date) - julianday(order_date)), 2) AS delivery_days,
+       ROUND(100.0 * AVG(order_status IN ('Pending', 'Processing')), 1) AS not_shipped_pct,
+       ROUND(100.0 * AVG(order_status = 'Shipped'), 1) AS in_transit_pct
+FROM banded
+GROUP BY band, shipping_cost
+ORDER BY band, shipping_cost
+''')
+
+# Items of refunded orders count as returns.
+problem(17, 'product_profitability', 'Product Profitability Analysis', '''
+WITH sales AS (
+    SELECT oi.product_id, SUM(oi.quantity) AS units,
+           SUM(oi.total_price - oi.discount_amount) AS revenue,
+           SUM(CASE WHEN o.order_status = 'Refunded' THEN oi.quantity ELSE 0 END) AS returned,
+           SUM(CASE WHEN o.order_status = 'Refunded'
+                    THEN oi.total_price - oi.discount_amount ELSE 0 END) AS refunded
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+    GROUP BY oi.product_id
+),
+profit AS (
+    SELECT p.product_id, p.product_name, p.category_id, s.revenue - s.refunded AS net_revenue,
+           1.0 * s.returned / s.units AS return_rate,
+           s.revenue - s.refunded - (s.units - s.returned) * COALESCE(p.cost_price, 0) AS profit
+    FROM sales s
+    JOIN products p ON p.product_id = s.product_id
+),
+ranked AS (
+    SELECT *, profit / NULLIF(net_revenue, 0) AS margin,
+           ROW_NUMBER() OVER (PARTITION BY category_id
+                              ORDER BY profit / NULLIF(net_revenue, 0) DESC, product_id) AS best,
+           ROW_NUMBER() OVER (PARTITION BY category_id
+                              ORDER BY profit / NULLIF(net_revenue, 0), product_id) AS worst
+    FROM profit
+)
+SELECT c.category_name, r.product_id, r.product_name, ROUND(r.net_revenue, 2) AS net_revenue,
+       ROUND(r.profit, 2) AS profit, ROUND(100 * r.margin, 2) AS margin_pct,
+       ROUND(100 * r.return_rate, 2) AS return_rate_pct,
+       CASE WHEN r.best <= :per_category THEN 'Most profitable' ELSE 'Least profitable' END AS rank_group
+FROM ranked r
+JOIN categories c ON c.category_id = r.category_id
+WHERE r.best <= :per_category OR r.worst <= :per_category
+ORDER BY c.category_name, r.margin DESC, r.product_id
+''')
+
+problem(18, 'poor_review_impact', 'Customer Service Impact on Sales', '''
+WITH poor AS (
+    SELECT product_id, review_date
+    FROM reviews
+    WHERE rating <= :poor_rating
+),
+windowed AS (
+    SELECT pr.product_id,
+           SUM(CASE WHEN o.order_date < pr.review_date THEN oi.quantity ELSE 0 END) AS units_before,
+           SUM(CASE WHEN o.order_date >= pr.review_date THEN oi.quantity ELSE 0 END) AS units_after
+    FROM poor pr
+    JOIN order_items oi ON oi.product_id = pr.product_id
+    JOIN orders o ON o.order_id = oi.order_id
+                 AND o.order_date >= datetime(pr.review_date, '-30 days')
+                 AND o.order_date < datetime(pr.review_date, '+30 days')
+    GROUP BY pr.product_id, pr.review_date
+)
+SELECT product_id, COUNT(*) AS poor_reviews, SUM(units_before) AS units_30d_before,
+       SUM(units_after) AS units_30d_after,
+       ROUND(100.0 * (SUM(units_after) - SUM(units_before)) / NULLIF(SUM(units_before), 0), 1)
+           AS change_pct,
+       CASE
+           WHEN SUM(units_after) > SUM(units_before) THEN 'Recovered'
+           WHEN SUM(units_after) < SUM(units_before) THEN 'Declined'
+           ELSE 'Unchanged'
+       END AS outcome
+FROM windowed
+GROUP BY product_id
+ORDER BY change_pct, product_id
+''')
+
+problem(19, 'abc_analysis', 'Advanced ABC Analysis for Inventory', '''
+WITH sales AS (
+    SELECT oi.product_id, SUM(oi.total_price) AS revenue, SUM(oi.quantity) AS units,
+           (SUM(oi.total_price) - SUM(oi.quantity) * COALESCE(MAX(p.cost_price), 0))
+               / SUM(oi.total_price) AS margin
+    FROM order_items oi
+    JOIN products p ON p.product_id = oi.product_id
+    GROUP BY oi.product_id
+),
+scored AS (
+    SELECT product_id, revenue, margin, units,
+           0.40 * PERCENT_RANK() OVER (ORDER BY revenue)
+           + 0.35 * PERCENT_RANK() OVER (ORDER BY margin)
+           + 0.25 * PERCENT_RANK() OVER (ORDER BY units) AS score
+    FROM sales
+),
+cumulative AS (
+    SELECT *, SUM(score) OVER (ORDER BY score DESC, product_id ROWS UNBOUNDED PRECEDING)
+              / SUM(score) OVER () AS cumulative_share
+    FROM scored
+)
+SELECT product_id, ROUND(revenue, 2) AS revenue, ROUND(100 * margin, 2) AS margin_pct, units,
+       ROUND(score, 3) AS score,
+       CASE WHEN cumulative_share <= 0.8 THEN 'A'
+            WHEN cumulative_share <= 0.95 THEN 'B' ELSE 'C' END AS abc_class,
+       CASE WHEN cumulative_share <= 0.8 THEN 'Tight control, frequent reorder review'
+            WHEN cumulative_share <= 0.95 THEN 'Periodic review'
+            ELSE 'Minimal control, order in bulk' END AS strategy
+FROM cumulative
+ORDER BY score DESC, product_id
+''')
+
+problem(20, 'predicted_clv', 'Predictive Customer Lifetime Value', '''
+WITH sequenced AS (
+    SELECT user_id, order_date, total_amount AS y,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY order_date, order_id) AS x
+    FROM orders
+),
+customer AS (
+    SELECT user_id, COUNT(*) AS n, SUM(y) AS total, AVG(y) AS aov,
+           MIN(order_date) AS first_order, MAX(order_date) AS last_order,
+           (COUNT(*) * SUM(x * y) - SUM(x) * SUM(y))
+               / NULLIF(COUNT(*) * SUM(x * x) - SUM(x) * SUM(x), 0) AS trend
+    FROM sequenced
+    GROUP BY user_id
+),
+rated AS (
+    SELECT *, n / MAX((julianday(:as_of) - julianday(first_order)) / 30.44, 1) AS orders_per_month,
+           julianday(:as_of) - julianday(last_order) AS recency_days
+    FROM customer
+)
+SELECT user_id, n AS orders, ROUND(total, 2) AS historical_value, ROUND(aov, 2) AS avg_order_value,
+       ROUND(orders_per_month, 3) AS orders_per_month, ROUND(COALESCE(trend, 0), 2) AS trend_per_order,
+       ROUND(orders_per_month * :horizon_months
+             * MAX(aov + COALESCE(trend, 0) * orders_per_month * :horizon_months / 2, 0)
+             * CASE WHEN recency_days > 180 THEN 0.25 WHEN recency_days > 90 THEN 0.5 ELSE 1 END,
+             2) AS predicted_value
+FROM rated
+ORDER BY predicted_value DESC, user_id
+LIMIT :limit
+''')
+
+problem(21, 'association_rules', 'Market Basket Analysis with Association Rules', '''
+WITH baskets AS MATERIALIZED (
+    SELECT DISTINCT order_id, product_id FROM order_items
+),
+total AS (
+    SELECT COUNT(DISTINCT order_id) AS orders FROM baskets
+),
+frequent AS MATERIALIZED (
+    SELECT product_id, COUNT(*) AS orders
+    FROM baskets
+    GROUP BY product_id
+    HAVING COUNT(*) >= :min_support * (SELECT orders FROM total)
+),
+pairs AS (
+    SELECT a.product_id AS antecedent, b.product_id AS consequent, COUNT(*) AS orders
+    FROM frequent fa
+    JOIN baskets a ON a.product_id = fa.product_id
+    JOIN baskets b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+    JOIN frequent fb ON fb.product_id = b.product_id
+    GROUP BY a.product_id, b.product_id
+    HAVING COUNT(*) >= :min_support * (SELECT orders FROM total)
+)
+SELECT p.antecedent, p.consequent, p.orders,
+       ROUND(100.0 * p.orders / t.orders, 2) AS support_pct,
+       ROUND(100.0 * p.orders / fa.orders, 2) AS confidence_pct,
+       ROUND(1.0 * p.orders * t.orders / (fa.orders * fb.orders), 2) AS lift
+FROM pairs p
+CROSS JOIN total t
+JOIN frequent fa ON fa.product_id = p.antecedent
+JOIN frequent fb ON fb.product_id = p.consequent
+WHERE 1.0 * p.orders / fa.orders >= :min_confidence
+ORDER BY confidence_pct DESC, lift DESC, p.antecedent, p.consequent
+''')
+
+# There are no page-view or cart tables, so the funnel runs from registered
+# customers through ordering, paying and delivery.
+problem(22, 'customer_funnel', 'Customer Journey Funnel Analysis', '''
+WITH stages (step, stage, customers) AS (
+    SELECT 1, 'Registered', (SELECT COUNT(*) FROM users)
+    UNION ALL
+    SELECT 2, 'Placed an order', (SELECT COUNT(DISTINCT user_id) FROM orders)
+    UNION ALL
+    SELECT 3, 'Completed a payment',
+           (SELECT COUNT(DISTINCT user_id) FROM orders WHERE payment_status = 'Paid')
+    UNION ALL
+    SELECT 4, 'Received a delivery',
+           (SELECT COUNT(DISTINCT user_id) FROM orders WHERE order_status = 'Delivered')
+)
+SELECT step, stage, customers,
+       ROUND(100.0 * customers / LAG(customers) OVER (ORDER BY step), 2) AS step_conversion_pct,
+       ROUND(100.0 * customers / FIRST_VALUE(customers) OVER (ORDER BY step), 2) AS overall_pct
+FROM stages
+ORDER BY step
+''')
+
+problem(23, 'customer_scores', 'Dynamic Customer Scoring', '''
+WITH activity AS (
+    SELECT user_id, COUNT(*) AS orders, SUM(total_amount) AS spent,
+           julianday(:as_of) - julianday(MAX(order_date)) AS recency_days,
+           AVG(payment_status = 'Paid') AS paid_share,
+           SUM(payment_status = 'Failed') AS failed_payments
+    FROM orders
+    GROUP BY user_id
+),
+contributions AS (
+    SELECT user_id, COUNT(*) AS reviews FROM reviews GROUP BY user_id
+),
+scored AS (
+    SELECT a.*, COALESCE(c.reviews, 0) AS reviews,
+           100 * (0.30 * (1 - PERCENT_RANK() OVER (ORDER BY a.recency_days))
+                  + 0.25 * PERCENT_RANK() OVER (ORDER BY a.orders)
+                  + 0.30 * PERCENT_RANK() OVER (ORDER BY a.spent)
+                  + 0.05 * PERCENT_RANK() OVER (ORDER BY COALESCE(c.reviews, 0))
+                  + 0.10 * a.paid_share) AS score
+    FROM activity a
+    LEFT JOIN contributions c ON c.user_id = a.user_id
+)
+SELECT user_id, ROUND(score, 1) AS score, orders, ROUND(spent, 2) AS spent,
+       ROUND(recency_days, 1) AS recency_days, reviews,
+       ROUND(100 * paid_share, 1) AS paid_pct,
+       CASE
+           WHEN failed_payments > 0 THEN 'Payment issues'
+           WHEN score >= :vip_score THEN 'VIP'
+           WHEN recency_days > 180 THEN 'Inactive'
+           ELSE 'Regular'
+       END AS status
+FROM scored
+ORDER BY score DESC, user_id
+LIMIT :limit
+''')
+
+
+def lookup(choice):
+    """Find a problem by number (5, '5') or name ('co_purchases')."""
+    if str(choice).isdigit():
+        return PROBLEMS.get(int(choice))
+    return next((p for p in PROBLEMS.values() if p.name == choice), None)
+
+
+def default_params(conn, **overrides):
+    params = dict(DEFAULT_PARAMS)
+    params['as_of'] = conn.execute('SELECT MAX(order_date) FROM orders').fetchone()[0]
+    params.update(overrides)
+    return params
+
+
+def run(conn, choice, params=None):
+    """Run one problem's query; return (column names, rows)."""
+    cursor = conn.execute(lookup(choice).sql, params or default_params(conn))
+    return [column[0] for column in cursor.description], cursor.fetchall()
+
+
+# Checks against a small hand-made dataset. FIXTURE_* rows are inserted into
+# a copy of the schema; a few answers are recomputed in Python and the rest
+# are listed in FIXTURE_EXPECTED.
+FIXTURE_AS_OF = '2024-12-31 12:00:00'
+FIXTURE_USERS = [
+    # user_id, username, registration_date, shipping address
+    (1, 'ann', '2024-01-10 09:00:00', '1 Main St\nAustin, TX 73301'),
+    (2, 'bob', '2024-02-05 10:00:00', '2 Oak Ave\nDallas, TX 75001'),
+    (3, 'cat', '2024-02-20 11:00:00', '3 Pine Rd\nMiami, FL 33101'),
+    (4, 'dan', '2024-03-01 12:00:00', 'USNS Dan\nFPO AE 09000'),
+]
+FIXTURE_PRODUCTS = [
+    # product_id, category_id, price, cost_price, stock_quantity
+    (1, 2, 100.0, 60.0, 5),
+    (2, 3, 1000.0, 700.0, 50),
+    (3, 5, 20.0, 5.0, 100),
+    (4, 2, 50.0, 30.0, 40),
+]
+FIXTURE_ORDERS = [
+    # order_id, user_id, order_date, payment_status, order_status,
+    # [(product_id, quantity[, unit_price if not the list price])]
+    (1, 1, '2024-08-03 10:00:00', 'Paid', 'Delivered', [(1, 1), (3, 2)]),
+    (2, 1, '2024-09-07 10:00:00', 'Paid', 'Delivered', [(1, 1), (3, 1)]),
+    (3, 1, '2024-10-02 10:00:00', 'Paid', 'Delivered', [(2, 1)]),
+    (4, 1, '2024-11-15 10:00:00', 'Paid', 'Shipped', [(1, 2), (3, 1), (4, 1)]),
+    (5, 1, '2024-12-20 10:00:00', 'Pending', 'Pending', [(3, 3, 25.0)]),
+    (6, 2, '2024-03-10 10:00:00', 'Paid', 'Delivered', [(2, 1), (1, 1)]),
+    (7, 2, '2024-05-12 10:00:00', 'Refunded', 'Refunded', [(4, 2)]),
+    (8, 3, '2024-12-01 10:00:00', 'Failed', 'Cancelled', [(3, 1, 25.0), (4, 1)]),
+    (9, 4, '2024-07-04 10:00:00', 'Paid', 'Delivered', [(1, 1), (3, 1)]),
+]
+FIXTURE_SHIPMENTS = {
+    # order_id: (shipping_cost, shipping_date, delivery_date)
+    1: (0.0, '2024-08-04 10:00:00', '2024-08-07 10:00:00'),
+    2: (0.0, '2024-09-08 10:00:00', '2024-09-10 10:00:00'),
+    3: (15.0, '2024-10-03 10:00:00', '2024-10-05 10:00:00'),
+    4: (5.0, '2024-11-17 10:00:00', None),
+    6: (15.0, '2024-03-11 10:00:00', '2024-03-14 10:00:00'),
+    7: (5.0, '2024-05-13 10:00:00', '2024-05-16 10:00:00'),
+    9: (5.0, '2024-07-05 10:00:00', '2024-07-09 10:00:00'),
+}
+FIXTURE_LOYALTY_POINTS = {3: 100, 4: 27, 9: 12}
+FIXTURE_REVIEWS = [
+    # product_id, user_id, order_id, rating, review_date, is_verified_purchase
+    (1, 1, 1, 5, '2024-08-10 10:00:00', 1),
+    (1, 2, 6, 2, '2024-03-20 10:00:00', 1),
+    (3, 1, 2, 4, '2024-09-10 10:00:00', 1),
+    (2, 2, 6, 1, '2024-04-01 10:00:00', 1),
+    (4, 3, None, 3, '2024-12-05 10:00:00', 0),
+]
+
+# Whole result rows, in the query's column order, for the problems that
+# expected_results() does not recompute. Worked out by hand from the rows above.
+FIXTURE_EXPECTED = {
+    'product_performance': [
+        (2, 'Product 2', 'Electronics > Laptops', 2, 2000.0, 1.0),
+        (1, 'Product 1', 'Electronics > Smartphones', 6, 600.0, 3.5),
+        (3, 'Product 3', "Clothing > Men's Clothing", 9, 200.0, 4.0),
+        (4, 'Product 4', 'Electronics > Smartphones', 4, 200.0, 3.0),
+    ],
+    'customer_segments': [
+        ('At Risk', 2, 50.0, 660.0, 1.5),
+        ('High Value', 1, 25.0, 1605.0, 5.0),
+        ('Low Value', 1, 25.0, 75.0, 1.0),
+    ],
+    'inventory_alerts': [
+        (1, 'Product 1', 5, 10, 0, 1, 1, 0),
+        (2, 'Product 2', 50, 10, 0, 0, 1, 0),
+        (4, 'Product 4', 40, 10, 0, 0, 1, 0),
+    ],
+    'churn_risk': [
+        (2, 2, 1200.0, 63.0, 233.1, 3.7, 1),
+    ],
+    'seasonality': [
+        ('Smartphones', 1, 0.5, 1.0),
+        ('Smartphones', 2, 0.5, 1.0),
+        ('Smartphones', 3, 1.5, 1.0),
+        ('Smartphones', 4, 1.5, 1.0),
+        ("Men's Clothing", 3, 0.8, 0.4),
+        ("Men's Clothing", 4, 1.2, 0.4),
+        ('Laptops', 1, 1.0, 0.0),
+        ('Laptops', 4, 1.0, 0.0),
+    ],
+    'review_analytics': [
+        ("Men's Clothing", 1, 4.0, 4.0, None, None, None),
+        ('Smartphones', 3, 3.33, 3.5, 3.0, 2.0, 0.189),
+        ('Laptops', 1, 1.0, 1.0, None, None, None),
+    ],
+    'purchase_journey': [
+        (1, 5, 206.0, 34.8, 'Decreasing', 162.5, 48.9),
+        (2, 2, 34.0, 63.0, 'Decreasing', 162.5, 48.9),
+        (3, 1, 285.0, None, 'Single order', 162.5, 48.9),
+        (4, 1, 124.9, None, 'Single order', 162.5, 48.9),
+    ],
+    'price_change_impact': [
+        (3, '2024-12-01 10:00:00', 20.0, 25.0, 25.0, 1, 4, 20.0, 100.0, 1, 2),
+    ],
+    'loyalty_effectiveness': [
+        ('After loyalty', 2, 2.0, 284.17, 1.078, 50.0),
+        ('Before loyalty', 1, 2.0, 130.0, 1.739, 100.0),
+        ('Never used loyalty', 2, 1.5, 337.5, 0.983, 50.0),
+    ],
+    'geographic_sales': [
+        ('TX', 2805.0, 7, 400.71, 2, 2, 1),
+        ('Military/Other', 120.0, 1, 120.0, 1, 1, 2),
+        ('FL', 75.0, 1, 75.0, 1, 1, 3),
+    ],
+    'category_cross_sell': [
+        ('Laptops', 'Smartphones', 1, 50.0),
+        ("Men's Clothing", 'Smartphones', 5, 83.33),
+        ('Smartphones', "Men's Clothing", 5, 71.43),
+        ('Smartphones', 'Laptops', 1, 14.29),
+    ],
+    'retention_cohorts': [
+        ('2024-01', 1, 0.0, 0.0, 0.0, 0.0),
+        ('2024-02', 2, 50.0, 50.0, 0.0, 0.0),
+        ('2024-03', 1, 0.0, 0.0, 0.0, 0.0),
+    ],
+    'fulfillment_performance': [
+        ('Under 100', 0.0, 2, None, None, None, 50.0, 0.0),
+        ('100-500', 0.0, 2, 1.0, 2.5, 3.5, 0.0, 0.0),
+        ('100-500', 5.0, 3, 1.33, 3.5, 4.5, 0.0, 33.3),
+        ('500-2000', 15.0, 2, 1.0, 2.5, 3.5, 0.0, 0.0),
+    ],
+    'product_profitability': [
+        ('Laptops', 2, 'Product 2', 2000.0, 600.0, 30.0, 0.0, 'Most profitable'),
+        ("Men's Clothing", 3, 'Product 3', 200.0, 155.0, 77.5, 0.0, 'Most profitable'),
+        ('Smartphones', 1, 'Product 1', 600.0, 240.0, 40.0, 0.0, 'Most profitable'),
+        ('Smartphones', 4, 'Product 4', 100.0, 40.0, 40.0, 50.0, 'Most profitable'),
+    ],
+    'poor_review_impact': [
+        (1, 1, 1, 0, -100.0, 'Declined'),
+        (2, 1, 1, 0, -100.0, 'Declined'),
+    ],
+    'abc_analysis': [
+        (3, 200.0, 77.5, 9, 0.6, 'A', 'Tight control, frequent reorder review'),
+        (1, 600.0, 40.0, 6, 0.55, 'A', 'Tight control, frequent reorder review'),
+        (2, 2000.0, 30.0, 2, 0.4, 'B', 'Periodic review'),
+        (4, 200.0, 40.0, 4, 0.2, 'C', 'Minimal control, order in bulk'),
+    ],
+    'predicted_clv': [
+        (1, 5, 1605.0, 321.0, 1.014, 2.0, 4054.42),
+        (3, 1, 75.0, 75.0, 1.0, 0.0, 900.0),
+        (4, 1, 120.0, 120.0, 0.169, 0.0, 60.85),
+        (2, 2, 1200.0, 600.0, 0.206, -1000.0, 0.0),
+    ],
+    'association_rules': [
+        (1, 3, 4, 44.44, 80.0, 1.2),
+        (3, 1, 4, 44.44, 66.67, 1.2),
+        (4, 3, 2, 22.22, 66.67, 1.0),
+        (3, 4, 2, 22.22, 33.33, 1.0),
+    ],
+    'customer_scores': [
+        (1, 96.3, 5, 1605.0, 11.1, 2, 80.0, 'VIP'),
+        (2, 45.0, 2, 1200.0, 233.1, 2, 50.0, 'Inactive'),
+        (4, 30.0, 1, 120.0, 180.1, 0, 100.0, 'Inactive'),
+        (3, 21.7, 1, 75.0, 30.1, 1, 0.0, 'Payment issues'),
+    ],
+}
+
+
+def copy_schema(source, target):
+    """Create source's tables, indexes and triggers in target and copy its categories."""
+    for (sql,) in source.execute(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END"):
+        target.execute(sql)
+    target.executemany('INSERT INTO categories (category_id, category_name, parent_category_id) '
+                       'VALUES (?, ?, ?)',
+                       source.execute('SELECT category_id, category_name, parent_category_id '
+                                      'FROM categories').fetchall())
+    target.commit()
+
+
+def fixture_lines(lines):
+    """(product_id, quantity, unit_price) for an order's FIXTURE_ORDERS lines."""
+    prices = {product_id: price for product_id, _, price, _, _ in FIXTURE_PRODUCTS}
+    return [(product_id, quantity, price[0] if price else prices[product_id])
+            for product_id, quantity, *price in lines]
+
+
+def build_fixture(conn):
+    addresses = {user_id: address for user_id, _, _, address in FIXTURE_USERS}
+    conn.executemany('''
+    INSERT INTO users (user_id, username, email, password_hash, first_name, last_name,
+                       registration_date, shipping_address, billing_address)
+    VALUES (?, ?, ? || '@example.com', 'x', ?, 'Test', ?, ?, ?)
+    ''', [(user_id, name, name, name.title(), registered, address, address)
+          for user_id, name, registered, address in FIXTURE_USERS])
+    conn.executemany('''
+    INSERT INTO products (product_id, product_name, category_id, sku, price, cost_price, stock_quantity)
+    VALUES (?, 'Product ' || ?, ?, 'SKU-' || ?, ?, ?, ?)
+    ''', [(product_id, product_id, category_id, product_id, price, cost, stock)
+          for product_id, category_id, price, cost, stock in FIXTURE_PRODUCTS])
+    for order_id, user_id, ordered, payment, status, lines in FIXTURE_ORDERS:
+        lines = fixture_lines(lines)
+        subtotal = sum(price * quantity for _, quantity, price in lines)
+        shipping_cost, shipped, delivered = FIXTURE_SHIPMENTS.get(order_id, (0.0, None, None))
+        conn.execute('''
+        INSERT INTO orders (order_id, user_id, order_number, order_status, order_date, shipping_date,
+                            delivery_date, subtotal, shipping_cost, total_amount, payment_method,
+                            payment_status, shipping_address, billing_address, loyalty_points_earned)
+        VALUES (?, ?, 'ORD-' || ?, ?, ?, ?, ?, ?, ?, ?, 'Credit Card', ?, ?, ?, ?)
+        ''', (order_id, user_id, order_id, status, ordered, shipped, delivered, subtotal,
+              shipping_cost, subtotal, payment, addresses[user_id], addresses[user_id],
+              FIXTURE_LOYALTY_POINTS.get(order_id, 0)))
+        conn.executemany('''
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price,
+                                 product_name, product_sku)
+        VALUES (?, ?, ?, ?, ?, 'Product ' || ?, 'SKU-' || ?)
+        ''', [(order_id, product_id, quantity, price, price * quantity, product_id, product_id)
+              for product_id, quantity, price in lines])
+    conn.executemany('''
+    INSERT INTO reviews (product_id, user_id, order_id, rating, review_date, is_verified_purchase)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', FIXTURE_REVIEWS)
+    conn.commit()
+
+
+def expected_results():
+    """Recompute a few of the answers for the fixture in plain Python."""
+    totals = {order_id: sum(price * quantity for _, quantity, price in fixture_lines(lines))
+              for order_id, _, _, _, _, lines in FIXTURE_ORDERS}
+    by_user = defaultdict(list)
+    for order_id, user_id, ordered, _, _, _ in FIXTURE_ORDERS:
+        by_user[user_id].append(totals[order_id])
+    clv = sorted(((user_id, len(values), round(sum(values), 2))
+                  for user_id, values in by_user.items() if len(values) > 3),
+                 key=lambda row: -row[2])
+
+    monthly = defaultdict(float)
+    for order_id, _, ordered, _, _, _ in FIXTURE_ORDERS:
+        if ordered >= '2024-01-01':
+            monthly[ordered[:7]] += totals[order_id]
+
+    products = {order_id: {p for p, *_ in lines} for order_id, _, _, _, _, lines in FIXTURE_ORDERS}
+    orders_with = Counter(p for items in products.values() for p in items)
+    together = Counter((a, b) for items in products.values() for a in items for b in items if a != b)
+    top_pairs = {}
+    for (a, b), count in together.items():
+        top_pairs.setdefault(a, []).append((-count, b))
+    top_pairs = {a: [(b, -count, round(100.0 * -count / orders_with[a], 2))
+                     for count, b in sorted(pairs)[:3]]
+                 for a, pairs in top_pairs.items()}
+
+    users_ordered = {user_id for _, user_id, _, _, _, _ in FIXTURE_ORDERS}
+    users_paid = {user_id for _, user_id, _, paid, _, _ in FIXTURE_ORDERS if paid == 'Paid'}
+    users_delivered = {user_id for _, user_id, _, _, status, _ in FIXTURE_ORDERS
+                       if status == 'Delivered'}
+    return {
+        'customer_lifetime_value': clv,
+        'monthly_revenue_trend': {month: round(value, 2) for month, value in monthly.items()},
+        'co_purchases': top_pairs,
+        'customer_funnel': [len(FIXTURE_USERS), len(users_ordered), len(users_paid),
+                            len(users_delivered)],
+    }
+
+
+def fixture_db(schema_db='ecommerce.db'):
+    """Return an in-memory database with schema_db's schema and the FIXTURE_* rows."""
+    conn = connect(':memory:')
+    with closing(connect(schema_db, read_only=True)) as source:
+        copy_schema(source, conn)
+    build_fixture(conn)
+    return conn
+
+
+def check(schema_db='ecommerce.db'):
+    """Run every problem on the fixture; return a list of failure messages."""
+    expected = expected_results()
+    failures = []
+    results = {}
+    conn = fixture_db(schema_db)
+    try:
+        params = default_params(conn, as_of=FIXTURE_AS_OF, min_support=0.2)
+        for number, p in sorted(PROBLEMS.items()):
+            try:
+                columns, rows = run(conn, number, params)
+            except sqlite3.Error as error:
+                failures.append(f"{number}. {p.name}: {error}")
+                continue
+            results[p.name] = [dict(zip(columns, row)) for row in rows]
+    finally:
+        conn.close()
+
+    def expect(name, actual, wanted):
+        if actual != wanted:
+            failures.append(f"{name}: expected {wanted!r}, got {actual!r}")
+
+    if 'customer_lifetime_value' in results:
+        expect('customer_lifetime_value',
+               [(row['user_id'], row['orders'], row['lifetime_value'])
+                for row in results['customer_lifetime_value']],
+               expected['customer_lifetime_value'])
+    if 'monthly_revenue_trend' in results:
+        expect('monthly_revenue_trend',
+               {row['month']: row['revenue'] for row in results['monthly_revenue_trend']},
+               expected['monthly_revenue_trend'])
+    if 'co_purchases' in results:
+        pairs = defaultdict(list)
+        for row in results['co_purchases']:
+            pairs[row['product_id']].append(
+                (row['other_product_id'], row['together'], row['co_purchase_pct']))
+        expect('co_purchases', dict(pairs), expected['co_purchases'])
+    if 'customer_funnel' in results:
+        expect('customer_funnel', [row['customers'] for row in results['customer_funnel']],
+               expected['customer_funnel'])
+    for name, rows in FIXTURE_EXPECTED.items():
+        if name in results:
+            expect(name, [tuple(row.values()) for row in results[name]], rows)
+    return failures
+
+
+def benchmark(order_counts, schema_db='ecommerce.db', seed=1, repeat=1):
+    """Time every problem on generated databases with the given order counts.
+
+    Returns rows of [problem, seconds at each size]. Databases are built in a
+    temporary directory with bulk_generate and the workload indexes.
+    """
+    from bulk_generate import BASE_COUNTS, bulk_generate
+    from migrate_indexes import apply_indexes
+
+    timings = defaultdict(list)
+    with tempfile.TemporaryDirectory() as directory:
+        for orders in order_counts:
+            path = os.path.join(directory, f'bench_{orders}.db')
+            with closing(connect(path)) as conn, \
+                    closing(connect(schema_db, read_only=True)) as source:
+                copy_schema(source, conn)
+            bulk_generate(path, orders / BASE_COUNTS['orders'], seed=seed,
+                          workers=os.cpu_count() or 1)
+            with closing(connect(path)) as conn:
+                apply_indexes(conn)
+                params = default_params(conn)
+                for number, p in sorted(PROBLEMS.items()):
+                    best = None
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        run(conn, number, params)
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[number].append(best)
+                    print(f"{orders:>9,} orders  {number:>2}. {p.name}: {best:.3f}s")
+    return [[f"{number}. {PROBLEMS[number].name}"] + [f"{t:.3f}" for t in times]
+            for number, times in sorted(timings.items())]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ProblemStatement.md analytics queries.")
+    parser.add_argument('problems', nargs='*', help="problem numbers or names (default: all)")
+    parser.add_argument('--db', default='ecommerce.db')
+    parser.add_argument('--as-of', help="date the relative windows end at (default: newest order)")
+    parser.add_argument('--limit', type=int, default=DEFAULT_PARAMS['limit'],
+                        help="rows to print per problem")
+    parser.add_argument('--check', action='store_true',
+                        help="verify the queries on a small built-in fixture")
+    parser.add_argument('--bench', type=int, nargs='+', metavar='ORDERS',
+                        help="time every problem on generated databases of these sizes")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check(args.db)
+        for failure in failures:
+            print(failure)
+        print(f"{len(PROBLEMS)} problems checked, {len(failures)} failures")
+        raise SystemExit(1 if failures else 0)
+    if args.bench:
+        rows = benchmark(args.bench, args.db)
+        print(tabulate(rows, headers=['Problem'] + [f"{n:,} orders (s)" for n in args.bench],
+                       tablefmt='grid'))
+        raise SystemExit(0)
+
+    overrides = {'as_of': args.as_of} if args.as_of else {}
+    with closing(connect(args.db, read_only=True)) as conn:
+        params = default_params(conn, **overrides)
+        for choice in args.problems or sorted(PROBLEMS):
+            p = lookup(choice)
+            if p is None:
+                raise SystemExit(f"Unknown problem: {choice}")
+            started = time.perf_counter()
+            columns, rows = run(conn, p.number, params)
+            print(f"\n=== {p.number}. {p.title.upper()} ({len(rows)} rows, "
+                  f"{time.perf_counter() - started:.3f}s) ===")
+            print(tabulate(rows[:args.limit], headers=columns, tablefmt='grid'))
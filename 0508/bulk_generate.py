@@ -0,0 +1,444 @@
+import argparse
+import hashlib
+import os
+import secrets
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from faker import Faker
+
+import rollups
+from counters import repair_counters
+from db import connect
+
+# Row counts at --scale 1; they match insert_sample_data.py.
+BASE_COUNTS = {'users': 100, 'products': 200, 'orders': 150, 'reviews': 300}
+BATCH_SIZE = 50_000
+POOL_SIZE = 1000
+# Rows generated per task. Each chunk draws from its own random stream, so
+# the output depends on the seed and scale but not on the worker count.
+CHUNK_ROWS = 10_000
+# Generated history ends here unless --as-of says otherwise, so a seed
+# gives the same timestamps on every run.
+REFERENCE_DATE = datetime(2025, 1, 1)
+
+PRODUCT_NAMES = [
+    "Premium Laptop", "Smartphone Pro", "Classic T-Shirt", "Denim Jeans",
+    "Running Shoes", "Wireless Earbuds", "Smart Watch", "Gaming Console",
+    "Coffee Maker", "Backpack", "Sunglasses", "Desk Chair"
+]
+BRANDS = ["TechPro", "StyleX", "ComfortPlus", "SportMaster", "EliteGear"]
+# A product's label indexes this list of (brand, name) pairs.
+LABELS = [(brand, name) for brand in BRANDS for name in PRODUCT_NAMES]
+MATERIALS = ["Cotton", "Polyester", "Leather", "Metal", "Plastic", "Glass"]
+COLORS = ["Black", "White", "Blue", "Red", "Gray", "Green"]
+SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+GENDERS = ['M', 'F', 'Other']
+SHIPPING_COSTS = np.array([5.99, 7.99, 10.99, 15.99])
+ORDER_STATUSES = ['Pending', 'Processing', 'Shipped', 'Delivered']
+PAYMENT_METHODS = ['Credit Card', 'PayPal', 'Bank Transfer']
+PAYMENT_STATUSES = ['Pending', 'Paid']
+DAY_SECONDS = 86400
+TABLE_STREAMS = {'users': 1, 'products': 2, 'orders': 3, 'reviews': 4}
+# Chunk number of the per-table streams for attributes other tables copy.
+ATTRIBUTES = 1 << 31
+
+# Bulk-load settings: no rollback journal on disk and no fsync per commit.
+# A crash mid-load can lose the load, which is fine for generated data.
+BULK_PRAGMAS = (
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA temp_store = MEMORY',
+)
+LOADED_TABLES = ('users', 'products', 'orders', 'order_items', 'reviews')
+
+# Timestamp columns are always bound, so the output is fully reproducible
+# and SQLite skips evaluating CURRENT_TIMESTAMP defaults row by row.
+INSERT_SQL = {
+    'users': '''
+    INSERT INTO users (user_id, username, email, password_hash, first_name, last_name,
+                       phone, date_of_birth, gender, registration_date,
+                       shipping_address, billing_address, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'products': '''
+    INSERT INTO products (product_id, product_name, product_description, category_id,
+                          brand, sku, price, cost_price, stock_quantity,
+                          weight, dimensions, color, size, material, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'orders': '''
+    INSERT INTO orders (order_id, user_id, order_number, order_status, order_date,
+                        subtotal, tax_amount, shipping_cost, total_amount,
+                        payment_method, payment_status, shipping_address, billing_address,
+                        created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'order_items': '''
+    INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price,
+                             product_name, product_sku, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+    # Duplicates of (user, product, order) are skipped like in insert_sample_data.py.
+    'reviews': '''
+    INSERT OR IGNORE INTO reviews (product_id, user_id, order_id, rating, review_title,
+                                   review_text, is_verified_purchase, review_date, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''',
+}
+
+# The Plan of the running load, set in each worker by init_worker.
+_plan = None
+
+
+def chunk_rng(seed, table, chunk):
+    return np.random.default_rng([seed, TABLE_STREAMS[table], chunk])
+
+
+def build_pools(seed, size=POOL_SIZE):
+    """Pre-generate Faker values once; rows then pick from these pools."""
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        'first_names': [fake.first_name() for _ in range(size)],
+        'last_names': [fake.last_name() for _ in range(size)],
+        'domains': [fake.domain_name() for _ in range(size // 10 or 1)],
+        'phones': [fake.phone_number() for _ in range(size)],
+        'addresses': [fake.address() for _ in range(size)],
+        'password_hashes': [hashlib.sha256(fake.password().encode()).hexdigest()
+                            for _ in range(size)],
+        'texts': [fake.text(max_nb_chars=200) for _ in range(size)],
+        'sentences': [fake.sentence() for _ in range(size)],
+        'paragraphs': [fake.paragraph() for _ in range(size)],
+    }
+
+
+def pick(pool, rng, n):
+    """Return n random entries of pool as a list."""
+    return [pool[i] for i in rng.integers(0, len(pool), n).tolist()]
+
+
+def timestamps(as_of, rng, n, max_days, min_days=0):
+    """Return n 'YYYY-MM-DD HH:MM:SS' times between max_days and min_days before as_of."""
+    offsets = (min_days + rng.random(n) * (max_days - min_days)) * DAY_SECONDS
+    stamps = (np.datetime64(as_of, 's') - offsets.astype('timedelta64[s]')).astype(str)
+    return [stamp.replace('T', ' ') for stamp in stamps.tolist()]
+
+
+class Plan:
+    """What a worker needs to build any chunk: first ids, counts, the Faker
+    pools, and the user and product attributes that other tables copy."""
+
+    def __init__(self, seed, counts, first_ids, category_ids, as_of):
+        self.seed = seed
+        self.counts = counts
+        self.first_ids = first_ids
+        self.category_ids = category_ids
+        self.as_of = as_of
+        self.as_of_text = as_of.isoformat(' ', 'seconds')
+        self.run_tag = format(seed, 'X')
+        self.pools = build_pools(seed)
+        rng = chunk_rng(seed, 'users', ATTRIBUTES)
+        self.user_addresses = rng.integers(0, len(self.pools['addresses']),
+                                           (counts['users'], 2), dtype=np.uint16)
+        rng = chunk_rng(seed, 'products', ATTRIBUTES)
+        self.product_labels = rng.integers(0, len(LABELS), counts['products'], dtype=np.uint8)
+        self.product_prices = np.round(rng.uniform(10, 1000, counts['products']), 2)
+
+    def chunks(self, table):
+        """Return (chunk number, first id, row count) for each chunk of table."""
+        first, total = self.first_ids[table], self.counts[table]
+        return [(chunk, first + start, min(CHUNK_ROWS, total - start))
+                for chunk, start in enumerate(range(0, total, CHUNK_ROWS))]
+
+    def product_names(self, labels):
+        return [f"{LABELS[label][0]} {LABELS[label][1]}" for label in labels]
+
+    def skus(self, product_ids, labels):
+        return [f"{LABELS[label][0][:3]}-{LABELS[label][1][:3]}-{self.run_tag}-{product_id}"
+                for product_id, label in zip(product_ids, labels)]
+
+    def addresses(self, user_indexes):
+        addresses = self.pools['addresses']
+        pairs = self.user_addresses[user_indexes].tolist()
+        return [addresses[ship] for ship, _ in pairs], [addresses[bill] for _, bill in pairs]
+
+
+def init_worker(plan):
+    global _plan
+    _plan = plan
+
+
+def user_rows(chunk, first_id, n):
+    plan, pools = _plan, _plan.pools
+    rng = chunk_rng(plan.seed, 'users', chunk)
+    ids = range(first_id, first_id + n)
+    first_names = pick(pools['first_names'], rng, n)
+    last_names = pick(pools['last_names'], rng, n)
+    usernames = [f"{first.lower()}{last.lower()}_{plan.run_tag}_{user_id}"
+                 for first, last, user_id in zip(first_names, last_names, ids)]
+    emails = [f"{username}@{domain}"
+              for username, domain in zip(usernames, pick(pools['domains'], rng, n))]
+    births = [stamp[:10] for stamp in timestamps(plan.as_of, rng, n, 90 * 365, 18 * 365)]
+    offset = first_id - plan.first_ids['users']
+    shipping, billing = plan.addresses(slice(offset, offset + n))
+    registered = timestamps(plan.as_of, rng, n, 730)
+    return list(zip(
+        ids, usernames, emails, pick(pools['password_hashes'], rng, n),
+        first_names, last_names, pick(pools['phones'], rng, n), births,
+        pick(GENDERS, rng, n), registered, shipping, billing, registered, registered,
+    ))
+
+
+def product_rows(chunk, first_id, n):
+    plan = _plan
+    rng = chunk_rng(plan.seed, 'products', chunk)
+    ids = range(first_id, first_id + n)
+    offset = first_id - plan.first_ids['products']
+    labels = plan.product_labels[offset:offset + n].tolist()
+    return list(zip(
+        ids, plan.product_names(labels), pick(plan.pools['texts'], rng, n),
+        pick(plan.category_ids, rng, n), [LABELS[label][0] for label in labels],
+        plan.skus(ids, labels), plan.product_prices[offset:offset + n].tolist(),
+        np.round(rng.uniform(5, 800, n), 2).tolist(), rng.integers(0, 1001, n).tolist(),
+        np.round(rng.uniform(0.1, 20, n), 2).tolist(),
+        [f"{x}x{y}x{z}" for x, y, z in rng.integers(1, 101, (n, 3)).tolist()],
+        pick(COLORS, rng, n), pick(SIZES, rng, n), pick(MATERIALS, rng, n),
+        [plan.as_of_text] * n, [plan.as_of_text] * n,
+    ))
+
+
+def order_rows(chunk, first_id, n):
+    """Return order and order_item rows, with totals computed up front (no UPDATEs)."""
+    plan = _plan
+    rng = chunk_rng(plan.seed, 'orders', chunk)
+    users = rng.integers(0, plan.counts['users'], n)
+    item_counts = rng.integers(1, 6, n)
+    products = rng.integers(0, plan.counts['products'], int(item_counts.sum()))
+    quantities = rng.integers(1, 6, len(products))
+    unit_prices = plan.product_prices[products]
+    total_prices = unit_prices * quantities
+    subtotals = np.add.reduceat(total_prices, np.cumsum(item_counts) - item_counts)
+    tax_amounts = np.round(subtotals * 0.1, 2)  # 10% tax
+    shipping_costs = SHIPPING_COSTS[rng.integers(0, len(SHIPPING_COSTS), n)]
+    ids = range(first_id, first_id + n)
+    shipping, billing = plan.addresses(users)
+    ordered = timestamps(plan.as_of, rng, n, 365)
+    orders = list(zip(
+        ids, (users + plan.first_ids['users']).tolist(),
+        [f"ORD-{plan.run_tag}-{order_id:08X}" for order_id in ids],
+        pick(ORDER_STATUSES, rng, n), ordered,
+        subtotals.tolist(), tax_amounts.tolist(), shipping_costs.tolist(),
+        (subtotals + tax_amounts + shipping_costs).tolist(),
+        pick(PAYMENT_METHODS, rng, n), pick(PAYMENT_STATUSES, rng, n), shipping, billing,
+        ordered, ordered,
+    ))
+    item_orders = np.repeat(np.arange(n), item_counts).tolist()
+    product_ids = (products + plan.first_ids['products']).tolist()
+    labels = plan.product_labels[products].tolist()
+    items = list(zip(
+        [first_id + k for k in item_orders], product_ids,
+        quantities.tolist(), unit_prices.tolist(), total_prices.tolist(),
+        plan.product_names(labels), plan.skus(product_ids, labels),
+        [ordered[k] for k in item_orders],
+    ))
+    return orders, items
+
+
+def review_rows(chunk, first_id, n):
+    plan, pools = _plan, _plan.pools
+    rng = chunk_rng(plan.seed, 'reviews', chunk)
+    verified = (rng.random(n) > 0.2).tolist()
+    order_ids = (plan.first_ids['orders'] + rng.integers(0, plan.counts['orders'], n)).tolist()
+    reviewed = timestamps(plan.as_of, rng, n, 365)
+    return list(zip(
+        (plan.first_ids['products'] + rng.integers(0, plan.counts['products'], n)).tolist(),
+        (plan.first_ids['users'] + rng.integers(0, plan.counts['users'], n)).tolist(),
+        [order_id if is_verified else None for order_id, is_verified in zip(order_ids, verified)],
+        rng.integers(1, 6, n).tolist(),
+        pick(pools['sentences'], rng, n), pick(pools['paragraphs'], rng, n),
+        [int(is_verified) for is_verified in verified], reviewed, reviewed,
+    ))
+
+
+def in_order(executor, builder, chunks, ahead):
+    """Yield builder(*chunk) for each chunk in order, keeping at most `ahead`
+    chunks in flight so results do not pile up behind the writer."""
+    if executor is None:
+        for chunk in chunks:
+            yield builder(*chunk)
+        return
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(builder, *chunk))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def next_id(cursor, table, column):
+    return (cursor.execute(f'SELECT COALESCE(MAX({column}), 0) FROM {table}').fetchone()[0]) + 1
+
+
+def drop_secondary_indexes(conn, tables=LOADED_TABLES):
+    """Drop the explicit indexes on tables and return their CREATE statements.
+
+    Building an index once after the load is much cheaper than updating it
+    row by row; UNIQUE constraints are left alone so duplicates still fail.
+    """
+    placeholders = ', '.join('?' * len(tables))
+    indexes = conn.execute(f'''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', tables).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    return [sql for _, sql in indexes]
+
+
+def drop_triggers(conn, tables=LOADED_TABLES):
+    """Drop the triggers on tables and return their CREATE statements.
+
+    The rollup triggers would run per inserted row; rollups.apply_delta
+    catches the summary tables up in one pass after the load instead.
+    """
+    placeholders = ', '.join('?' * len(tables))
+    triggers = conn.execute(f'''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name IN ({placeholders})
+    ''', tables).fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER "{name}"')
+    conn.commit()
+    return [sql for _, sql in triggers]
+
+
+class Writer:
+    """The one connection that inserts all generated rows, committing about
+    every batch_size rows."""
+
+    def __init__(self, conn, batch_size):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending = 0
+
+    def insert(self, table, rows):
+        self.conn.executemany(INSERT_SQL[table], rows)
+        self.pending += len(rows)
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+
+def bulk_generate(db_path='ecommerce.db', scale=1.0, batch_size=BATCH_SIZE, seed=None,
+                  workers=1, as_of=REFERENCE_DATE):
+    """Append generated rows to db_path and return the seed used.
+
+    The same seed, scale, as_of and starting database always give the same
+    rows, whatever the number of workers.
+    """
+    if seed is None:
+        seed = secrets.randbits(32)
+    counts = {table: max(1, int(base * scale)) for table, base in BASE_COUNTS.items()}
+
+    conn = connect(db_path)
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    cursor = conn.cursor()
+    category_ids = [row[0] for row in cursor.execute(
+        'SELECT category_id FROM categories ORDER BY category_id')]
+    if not category_ids:
+        conn.close()
+        raise SystemExit("No categories found; run create_database.py first.")
+    first_ids = {
+        'users': next_id(cursor, 'users', 'user_id'),
+        'products': next_id(cursor, 'products', 'product_id'),
+        'orders': next_id(cursor, 'orders', 'order_id'),
+        'reviews': next_id(cursor, 'reviews', 'review_id'),
+    }
+
+    print(f"Seed {seed}; building Faker pools...")
+    plan = Plan(seed, counts, first_ids, category_ids, as_of)
+    started = time.perf_counter()
+    index_sql, trigger_sql = [], []
+    executor = None
+    try:
+        index_sql = drop_secondary_indexes(conn)
+        trigger_sql = drop_triggers(conn)
+        writer = Writer(conn, batch_size)
+        if workers > 1:
+            executor = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(plan,))
+        else:
+            init_worker(plan)
+        ahead = 2 * workers
+
+        # 1. Users and 2. Products
+        for table, builder in (('users', user_rows), ('products', product_rows)):
+            for rows in in_order(executor, builder, plan.chunks(table), ahead):
+                writer.insert(table, rows)
+            print(f"Inserted {counts[table]:,} {table}")
+
+        # 3. Orders and order items
+        orders_started = time.perf_counter()
+        item_total = 0
+        for orders, items in in_order(executor, order_rows, plan.chunks('orders'), ahead):
+            writer.insert('orders', orders)
+            writer.insert('order_items', items)
+            item_total += len(items)
+        writer.commit()
+        elapsed = time.perf_counter() - orders_started
+        print(f"Inserted {counts['orders']:,} orders and {item_total:,} order items "
+              f"({(counts['orders'] + item_total) / elapsed:,.0f} rows/s)")
+
+        # 4. Reviews
+        for rows in in_order(executor, review_rows, plan.chunks('reviews'), ahead):
+            writer.insert('reviews', rows)
+        writer.commit()
+        print(f"Attempted {counts['reviews']:,} reviews")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # A failed or interrupted load keeps the batches committed so far, so
+        # the indexes, triggers and derived data are restored either way.
+        conn.rollback()
+
+        # 5. Indexes and triggers dropped for the load
+        for sql in index_sql + trigger_sql:
+            cursor.execute(sql)
+        conn.commit()
+
+        # 6. Counters and rollups, in one grouped pass each over the covering indexes
+        repair_counters(conn)
+        if rollups.installed(conn):
+            rollups.apply_delta(conn, first_ids['orders'])
+        conn.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+    return seed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-generate sample data for ecommerce.db.")
+    parser.add_argument('--db', default='ecommerce.db', help="SQLite database created by create_database.py")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiplier on 100 users, 200 products, 150 orders and 300 reviews")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="rows per commit")
+    parser.add_argument('--seed', type=int, help="seed for repeatable output (random if omitted)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes generating rows; one writer inserts them")
+    parser.add_argument('--as-of', type=datetime.fromisoformat, default=REFERENCE_DATE,
+                        help="date the generated history ends (default 2025-01-01)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    bulk_generate(args.db, args.scale, args.batch_size, args.seed, args.workers, args.as_of)
@@ -0,0 +1,158 @@
+import argparse
+import time
+
+from db import connect, differs, exit_with_report
+
+# The denormalized counters on products and users, kept in step with the
+# rows they summarise by triggers, so they change in the same transaction
+# as the write that affects them. Ratings are whole numbers, so
+# rating_average * rating_count rounds back to the exact rating sum and the
+# average can be updated without reading the product's other reviews.
+ADD_REVIEW = '''
+    UPDATE products
+    SET rating_average = (ROUND(rating_average * rating_count) + NEW.rating) / (rating_count + 1.0),
+        rating_count = rating_count + 1
+    WHERE product_id = NEW.product_id;'''
+REMOVE_REVIEW = '''
+    UPDATE products
+    SET rating_average = COALESCE(
+            (ROUND(rating_average * rating_count) - OLD.rating) / NULLIF(rating_count - 1.0, 0), 0),
+        rating_count = rating_count - 1
+    WHERE product_id = OLD.product_id;'''
+ADD_ITEM = '''
+    UPDATE products SET sales_count = sales_count + NEW.quantity WHERE product_id = NEW.product_id;'''
+REMOVE_ITEM = '''
+    UPDATE products SET sales_count = sales_count - OLD.quantity WHERE product_id = OLD.product_id;'''
+ADD_ORDER = '''
+    UPDATE users SET total_spent = total_spent + NEW.total_amount WHERE user_id = NEW.user_id;'''
+REMOVE_ORDER = '''
+    UPDATE users SET total_spent = total_spent - OLD.total_amount WHERE user_id = OLD.user_id;'''
+
+TRIGGERS = {
+    'counters_reviews_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_reviews_insert AFTER INSERT ON reviews
+    BEGIN {ADD_REVIEW}
+    END''',
+    'counters_reviews_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_reviews_delete AFTER DELETE ON reviews
+    BEGIN {REMOVE_REVIEW}
+    END''',
+    'counters_reviews_update': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_reviews_update AFTER UPDATE OF product_id, rating ON reviews
+    BEGIN {REMOVE_REVIEW} {ADD_REVIEW}
+    END''',
+    'counters_order_items_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_order_items_insert AFTER INSERT ON order_items
+    BEGIN {ADD_ITEM}
+    END''',
+    'counters_order_items_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_order_items_delete AFTER DELETE ON order_items
+    BEGIN {REMOVE_ITEM}
+    END''',
+    'counters_order_items_update': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_order_items_update
+    AFTER UPDATE OF product_id, quantity ON order_items
+    BEGIN {REMOVE_ITEM} {ADD_ITEM}
+    END''',
+    'counters_orders_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_orders_insert AFTER INSERT ON orders
+    BEGIN {ADD_ORDER}
+    END''',
+    'counters_orders_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_orders_delete AFTER DELETE ON orders
+    BEGIN {REMOVE_ORDER}
+    END''',
+    'counters_orders_update': f'''
+    CREATE TRIGGER IF NOT EXISTS counters_orders_update AFTER UPDATE OF user_id, total_amount ON orders
+    BEGIN {REMOVE_ORDER} {ADD_ORDER}
+    END''',
+}
+
+# The counters as recomputed from the base tables: (table, key, {column: expression}, FROM clause).
+EXPECTED = {
+    'products': ('product_id', {
+        'rating_count': 'COALESCE(r.rating_count, 0)',
+        'rating_average': 'COALESCE(r.rating_average, 0)',
+        'sales_count': 'COALESCE(i.sales_count, 0)',
+    }, '''
+    products t
+    LEFT JOIN (SELECT product_id, COUNT(*) AS rating_count, AVG(rating) AS rating_average
+               FROM reviews GROUP BY product_id) r ON r.product_id = t.product_id
+    LEFT JOIN (SELECT product_id, SUM(quantity) AS sales_count
+               FROM order_items GROUP BY product_id) i ON i.product_id = t.product_id
+    '''),
+    'users': ('user_id', {
+        'total_spent': 'COALESCE(o.total_spent, 0)',
+    }, '''
+    users t
+    LEFT JOIN (SELECT user_id, SUM(total_amount) AS total_spent
+               FROM orders GROUP BY user_id) o ON o.user_id = t.user_id
+    '''),
+}
+
+
+def repair_counters(conn):
+    """Recompute every counter set-based: one grouped pass per base table and
+    one UPDATE per counter table. Needs SQLite 3.33+ for UPDATE ... FROM."""
+    for table, (key, columns, source) in EXPECTED.items():
+        selected = ', '.join(f'{expression} AS {column}' for column, expression in columns.items())
+        assignments = ', '.join(f'{column} = expected.{column}' for column in columns)
+        conn.execute(f'''
+        UPDATE {table} SET {assignments}
+        FROM (SELECT t.{key} AS {key}, {selected} FROM {source}) AS expected
+        WHERE {table}.{key} = expected.{key}
+        ''')
+    conn.commit()
+
+
+def check_counters(conn):
+    """Return {table.column: number of rows whose counter is out of date}."""
+    drift = {}
+    for table, (key, columns, source) in EXPECTED.items():
+        for column, expression in columns.items():
+            drift[f'{table}.{column}'] = conn.execute(f'''
+            SELECT COUNT(*) FROM {source}
+            WHERE {differs(f't.{column}', expression)}
+            ''').fetchone()[0]
+    return drift
+
+
+def install_counters(conn):
+    """Create the triggers and bring the counters up to date. Safe to run
+    more than once."""
+    for sql in TRIGGERS.values():
+        conn.execute(sql)
+    repair_counters(conn)
+
+
+def uninstall_counters(conn):
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the product and user counters in ecommerce.db.")
+    parser.add_argument('--db', default='ecommerce.db')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--install', action='store_true', help="add the triggers and repair")
+    action.add_argument('--repair', action='store_true', help="recompute every counter")
+    action.add_argument('--uninstall', action='store_true', help="drop the triggers")
+    args = parser.parse_args()
+
+    conn = connect(args.db, read_only=not (args.install or args.repair or args.uninstall))
+    started = time.perf_counter()
+    try:
+        if args.install:
+            install_counters(conn)
+            print(f"Counter triggers installed in {time.perf_counter() - started:.2f}s")
+        elif args.repair:
+            repair_counters(conn)
+            print(f"Counters repaired in {time.perf_counter() - started:.2f}s")
+        elif args.uninstall:
+            uninstall_counters(conn)
+            print("Counter triggers removed")
+        else:
+            exit_with_report(check_counters(conn), ['Counter', 'Rows out of date'])
+    finally:
+        conn.close()
@@ -1,9 +1,12 @@
-import sqlite3
 from datetime import datetime
 
-def create_database():
+from counters import install_counters
+from db import DEFAULT_DB, connect
+from migrate_indexes import apply_indexes
+
+def create_database(db_path=DEFAULT_DB):
     # Connect to SQLite database (it will be created if it doesn't exist)
-    conn = sqlite3.connect('ecommerce.db')
+    conn = connect(db_path)
     cursor = conn.cursor()
 
     # 1. Users Table
@@ -151,11 +154,14 @@ def create_database():
     ''')
 
     # Create indexes
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_registration_date ON users(registration_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name ON products(product_name)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_total ON orders(total_amount)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews(review_date)')
+    # Join and filter indexes for the analytics workload
+    apply_indexes(conn)
+    # Triggers keeping products and users counters in step with each write
+    install_counters(conn)
 
     # Insert sample categories
     cursor.execute('''
@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from tabulate import tabulate
+
+DEFAULT_DB = 'ecommerce.db'
+DEFAULT_POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 5000
+# Prepared statements kept per connection, least recently used evicted
+# first. sqlite3 looks them up by SQL text, so only parameterised queries
+# hit the cache; an f-string with a value in it is a new statement each time.
+STATEMENT_CACHE_SIZE = 64
+
+# WAL lets readers keep reading the last commit while one writer appends,
+# and synchronous NORMAL is durable across application crashes in WAL mode.
+# Both change how the file is written, so only writable connections set them.
+WRITER_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+]
+CONNECTION_PRAGMAS = [
+    'PRAGMA mmap_size = 268435456',  # 256 MiB of the file read through the page cache
+    'PRAGMA cache_size = -65536',  # 64 MiB
+    f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}',
+    'PRAGMA temp_store = MEMORY',
+]
+
+# Floating point sums differ slightly with the order they are added in, so
+# stored totals are compared with their recomputation to within TOLERANCE.
+TOLERANCE = 1e-6
+
+
+def connect(path=DEFAULT_DB, read_only=False, statement_cache=STATEMENT_CACHE_SIZE,
+            check_same_thread=True):
+    """Open a connection with CONNECTION_PRAGMAS applied.
+
+    read_only connections open the file with mode=ro and skip WRITER_PRAGMAS,
+    so they never modify the database and work on read-only files; the
+    others also get WRITER_PRAGMAS.
+    """
+    if read_only:
+        path, uri = f'file:{quote(str(path))}?mode=ro', True
+    else:
+        uri = False
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=statement_cache,
+                           check_same_thread=check_same_thread, uri=uri)
+    for pragma in CONNECTION_PRAGMAS if read_only else WRITER_PRAGMAS + CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Up to size read-only connections and one writer for one database.
+
+    Readers never wait for the writer or each other in WAL mode; writes from
+    this process queue on the writer lock instead of retrying on SQLITE_BUSY.
+    Connections are reused, so each keeps its page cache and prepared
+    statements between uses.
+    """
+
+    def __init__(self, path=DEFAULT_DB, size=DEFAULT_POOL_SIZE, statement_cache=STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.size = size
+        self.statement_cache = statement_cache
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self, read_only):
+        return connect(self.path, read_only, self.statement_cache, check_same_thread=False)
+
+    @contextmanager
+    def reader(self):
+        """Lend a read-only connection, waiting while all size are in use."""
+        with self._slots:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect(read_only=True)
+            try:
+                yield conn
+            finally:
+                # End any open read so checkpoints are not held back.
+                conn.rollback()
+                with self._lock:
+                    self._idle.append(conn)
+
+    @contextmanager
+    def writer(self):
+        """Lend the writer connection; commit on success, roll back on error."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect(read_only=False)
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.rollback()
+                raise
+            self._writer.commit()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def table_names(conn):
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+
+
+def quote_table(conn, table):
+    """Quote table for use in SQL; raise ValueError unless it exists.
+
+    Identifiers cannot be bound as parameters, so they are checked instead.
+    """
+    if table not in table_names(conn):
+        raise ValueError(f"Unknown table: {table!r}")
+    return '"' + table.replace('"', '""') + '"'
+
+
+def fetch(conn, sql, params=()):
+    """Run a query and return (column names, rows)."""
+    cursor = conn.execute(sql, params)
+    return [description[0] for description in cursor.description], cursor.fetchall()
+
+
+def sample_rows(conn, table, limit=5):
+    return fetch(conn, f'SELECT * FROM {quote_table(conn, table)} LIMIT ?', (limit,))
+
+
+def row_count(conn, table):
+    return conn.execute(f'SELECT COUNT(*) FROM {quote_table(conn, table)}').fetchone()[0]
+
+
+def differs(stored, expected):
+    """SQL that is true when two expressions differ by more than TOLERANCE.
+
+    NULL only matches NULL.
+    """
+    return f'NOT ({stored} IS {expected} OR abs({stored} - {expected}) <= {TOLERANCE})'
+
+
+def exit_with_report(counts, headers):
+    """Print {name: count} as a table; exit 1 if any count is non-zero, else 0."""
+    print(tabulate(counts.items(), headers=headers, tablefmt='grid'))
+    raise SystemExit(1 if any(counts.values()) else 0)
@@ -1,18 +1,17 @@
+import os
+import sys
+
+# fibonacci.py lives with the other number modules at the repository root.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fibonacci import fibonacci_series
+
 def fibonacci(n):
-    # Initialize first two numbers
-    a, b = 0, 1
-    # Create empty list to store series
-    fib_series = []
-    
-    # Generate fibonacci series
-    for _ in range(n):
-        fib_series.append(a)
-        a, b = b, a + b
-    
-    return fib_series
+    # Return the first n Fibonacci numbers, generated lazily
+    return fibonacci_series(n)
 
 # Get input from user
 n = int(input("Enter how many Fibonacci numbers you want to generate: "))
 result = fibonacci(n)
 print(f"Fibonacci series with {n} numbers:")
-print(result)
\ No newline at end of file
+print(result)
@@ -1,15 +1,30 @@
+import argparse
 import sqlite3
 from faker import Faker
 from datetime import datetime, timedelta
 import random
 import json
 import hashlib
-import uuid
+
+from counters import install_counters
+from db import DEFAULT_DB, connect
 
 fake = Faker()
 
-def generate_sample_data():
-    conn = sqlite3.connect('ecommerce.db')
+def generate_sample_data(db_path=DEFAULT_DB, seed=None, as_of=None):
+    """Insert random users, products, orders and reviews into db_path.
+
+    Dates fall in the years before as_of (default: now). With a seed and an
+    as_of the same rows are generated on every run, apart from the
+    created_at and updated_at stamps.
+    """
+    if seed is not None:
+        random.seed(seed)
+        Faker.seed(seed)
+    as_of = as_of or datetime.now()
+    conn = connect(db_path)
+    # Ratings, sales and spend are then kept current by triggers as rows go in
+    install_counters(conn)
     cursor = conn.cursor()
     
     # Lists to store IDs for foreign key references
@@ -34,9 +49,12 @@ def generate_sample_data():
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             username, email, password_hash, first_name, last_name,
-            fake.phone_number(), fake.date_of_birth(minimum_age=18, maximum_age=90).isoformat(),
+            fake.phone_number(),
+            fake.date_between(start_date=as_of.date() - timedelta(days=91 * 365.24),
+                              end_date=as_of.date() - timedelta(days=18 * 365.24)).isoformat(),
             random.choice(['M', 'F', 'Other']),
-            fake.date_time_between(start_date='-2y').isoformat(),
+            fake.date_time_between(start_date=as_of - timedelta(days=2 * 365.24),
+                                   end_date=as_of).isoformat(),
             fake.address(), fake.address()
         ))
         user_ids.append(cursor.lastrowid)
@@ -88,7 +106,7 @@ def generate_sample_data():
     print("Inserting orders...")
     for _ in range(150):
         user_id = random.choice(user_ids)
-        order_date = fake.date_time_between(start_date='-1y')
+        order_date = fake.date_time_between(start_date=as_of - timedelta(days=365.24), end_date=as_of)
         
         # Get user's addresses
         cursor.execute('SELECT shipping_address, billing_address FROM users WHERE user_id = ?', (user_id,))
@@ -102,7 +120,7 @@ def generate_sample_data():
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             user_id,
-            f"ORD-{uuid.uuid4().hex[:8].upper()}",
+            f"ORD-{random.getrandbits(32):08X}",  # not uuid4, which ignores the seed
             random.choice(['Pending', 'Processing', 'Shipped', 'Delivered']),
             order_date.isoformat(),
             0,  # Will update after adding items
@@ -163,8 +181,8 @@ def generate_sample_data():
             cursor.execute('''
             INSERT INTO reviews (product_id, user_id, order_id,
                                rating, review_title, review_text,
-                               is_verified_purchase)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+                               is_verified_purchase, review_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 product_id,
                 user_id,
@@ -172,28 +190,23 @@ def generate_sample_data():
                 random.randint(1, 5),
                 fake.sentence(),
                 fake.paragraph(),
-                1 if order_id else 0
+                1 if order_id else 0,
+                as_of.isoformat(sep=' ', timespec='seconds')
             ))
         except sqlite3.IntegrityError:
             # Skip if user already reviewed this product
             continue
     
-    # Update product ratings
-    print("Updating product ratings...")
-    cursor.execute('''
-    UPDATE products
-    SET rating_count = (
-        SELECT COUNT(*) FROM reviews WHERE reviews.product_id = products.product_id
-    ),
-    rating_average = (
-        SELECT AVG(rating) FROM reviews WHERE reviews.product_id = products.product_id
-    )
-    ''')
-    
     # Commit and close
     conn.commit()
     conn.close()
     print("Sample data inserted successfully!")
 
 if __name__ == "__main__":
-    generate_sample_data()
+    parser = argparse.ArgumentParser(description="Fill ecommerce.db with random sample data.")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--seed', type=int, help="generate the same data on every run")
+    parser.add_argument('--as-of', type=datetime.fromisoformat,
+                        help="date the generated history ends at (default: now)")
+    args = parser.parse_args()
+    generate_sample_data(args.db, args.seed, args.as_of)
@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from db import connect
+
+# Indexes derived from the joins and filters in view_data.py and the
+# ProblemStatement.md workload (see query_plans.py for the query corpus).
+# Trailing columns make the common aggregates covering, so they are answered
+# from the index without touching the table rows.
+INDEXES = [
+    # Per-customer history: CLV, segmentation, churn and purchase journeys.
+    ('idx_orders_user_date', 'orders(user_id, order_date, total_amount)'),
+    # Date ranges and "most recent": monthly trends, cohorts, recent orders.
+    ('idx_orders_date', 'orders(order_date, total_amount, user_id)'),
+    # Lines of an order: every orders -> order_items join and market baskets.
+    ('idx_order_items_order', 'order_items(order_id, product_id, quantity, total_price)'),
+    # Sales of a product: product performance, co-purchases, velocity.
+    ('idx_order_items_product', 'order_items(product_id, order_id, quantity, total_price)'),
+    ('idx_reviews_product', 'reviews(product_id, rating)'),
+    ('idx_reviews_helpful', 'reviews(helpful_votes)'),
+    ('idx_products_rating_count', 'products(rating_count)'),
+    ('idx_categories_parent', 'categories(parent_category_id)'),
+]
+
+# products(category_id) is deliberately absent: with a handful of categories
+# a full scan beats the index lookups, and category joins go through the
+# categories primary key. reviews(user_id) is absent too: lookups by user
+# are served by the UNIQUE (user_id, product_id, order_id) index.
+
+# Indexes that duplicate another one: email already has the index that
+# enforces its UNIQUE constraint.
+REDUNDANT_INDEXES = ['idx_users_email']
+
+
+def apply_indexes(conn):
+    """Create the workload indexes, drop redundant ones and refresh the
+    planner statistics. Safe to run more than once."""
+    cursor = conn.cursor()
+    for name, target in INDEXES:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+    for name in REDUNDANT_INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    cursor.execute('ANALYZE')
+    conn.commit()
+
+
+def revert_indexes(conn):
+    """Undo apply_indexes, for before/after comparisons."""
+    cursor = conn.cursor()
+    for name, _ in INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+    cursor.execute('ANALYZE')
+    conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add the workload indexes to ecommerce.db.")
+    parser.add_argument('--db', default='ecommerce.db')
+    parser.add_argument('--revert', action='store_true', help="drop the indexes again")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    started = time.perf_counter()
+    try:
+        if args.revert:
+            revert_indexes(conn)
+            print("Workload indexes dropped")
+        else:
+            apply_indexes(conn)
+            print(f"Created {len(INDEXES)} indexes in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
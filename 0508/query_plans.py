@@ -0,0 +1,222 @@
+import argparse
+import re
+import time
+
+from tabulate import tabulate
+
+from analytics import PROBLEMS, default_params
+from db import connect
+from migrate_indexes import apply_indexes, revert_indexes
+
+# The read workload: the view_data.py queries and the access paths the
+# ProblemStatement.md problems are built from. Named parameters get their
+# values from sample_params().
+QUERIES = {
+    'view_categories_tree': '''
+    WITH RECURSIVE category_tree AS (
+        SELECT category_id, category_name, parent_category_id, 0 as level
+        FROM categories WHERE parent_category_id IS NULL
+        UNION ALL
+        SELECT c.category_id, c.category_name, c.parent_category_id, ct.level + 1
+        FROM categories c
+        JOIN category_tree ct ON c.parent_category_id = ct.category_id
+    )
+    SELECT category_name, level FROM category_tree ORDER BY level, category_name
+    ''',
+    'view_top_rated_products': '''
+    SELECT p.product_id, p.product_name, c.category_name, p.price,
+           p.stock_quantity, p.rating_average, p.rating_count
+    FROM products p
+    JOIN categories c ON p.category_id = c.category_id
+    ORDER BY p.rating_count DESC
+    LIMIT 5
+    ''',
+    'view_recent_orders': '''
+    SELECT o.order_id, o.order_number, u.username,
+           o.total_amount, o.order_status, o.payment_status,
+           (SELECT COUNT(*) FROM order_items oi WHERE oi.order_id = o.order_id) as items
+    FROM (SELECT * FROM orders
+          WHERE EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = orders.order_id)
+          ORDER BY order_date DESC LIMIT 5) o
+    JOIN users u ON o.user_id = u.user_id
+    ORDER BY o.order_date DESC
+    ''',
+    'view_order_items': '''
+    SELECT oi.order_id, p.product_name, oi.quantity, oi.unit_price, oi.total_price
+    FROM order_items oi
+    JOIN products p ON oi.product_id = p.product_id
+    LIMIT 5
+    ''',
+    'view_top_reviews': '''
+    SELECT r.review_id, p.product_name, u.username, r.rating, r.review_title,
+           r.helpful_votes, r.review_status
+    FROM reviews r
+    JOIN products p ON r.product_id = p.product_id
+    JOIN users u ON r.user_id = u.user_id
+    ORDER BY r.helpful_votes DESC
+    LIMIT 5
+    ''',
+    'view_order_stats': 'SELECT COUNT(*), AVG(total_amount) FROM orders',
+    'view_review_stats': 'SELECT COUNT(*), AVG(rating) FROM reviews',
+    'customer_orders': '''
+    SELECT order_id, order_date, total_amount FROM orders
+    WHERE user_id = :user_id ORDER BY order_date
+    ''',
+    'customer_lifetime_value': '''
+    SELECT user_id, COUNT(*) AS orders, SUM(total_amount) AS total_spent,
+           MIN(order_date) AS first_order, MAX(order_date) AS last_order
+    FROM orders
+    GROUP BY user_id
+    HAVING COUNT(*) > 3
+    ORDER BY total_spent DESC
+    LIMIT 10
+    ''',
+    'orders_since': '''
+    SELECT strftime('%Y-%m', order_date) AS month, COUNT(DISTINCT user_id), SUM(total_amount)
+    FROM orders
+    WHERE order_date >= :since
+    GROUP BY month
+    ''',
+    'order_lines': '''
+    SELECT oi.product_id, oi.quantity, oi.total_price
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    WHERE o.user_id = :user_id
+    ''',
+    'product_sales': '''
+    SELECT COUNT(DISTINCT order_id), SUM(quantity), SUM(total_price)
+    FROM order_items WHERE product_id = :product_id
+    ''',
+    'product_recent_sales': '''
+    SELECT SUM(oi.quantity)
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+    WHERE oi.product_id = :product_id AND o.order_date >= :since
+    ''',
+    'co_purchases': '''
+    SELECT b.product_id, COUNT(*) AS together
+    FROM order_items a
+    JOIN order_items b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+    WHERE a.product_id = :product_id
+    GROUP BY b.product_id
+    ORDER BY together DESC
+    LIMIT 3
+    ''',
+    'product_rating': '''
+    SELECT COUNT(*), AVG(rating) FROM reviews WHERE product_id = :product_id
+    ''',
+    'customer_reviews': '''
+    SELECT review_id, product_id, rating FROM reviews WHERE user_id = :user_id
+    ''',
+    'category_products': '''
+    SELECT product_id, product_name, price FROM products WHERE category_id = :category_id
+    ''',
+    'category_revenue': '''
+    SELECT p.category_id, SUM(oi.total_price)
+    FROM order_items oi
+    JOIN products p ON p.product_id = oi.product_id
+    GROUP BY p.category_id
+    ''',
+}
+
+SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+# "FROM orders o" / "JOIN order_items AS oi": plans name tables by alias.
+TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+
+def sample_params(conn):
+    """Parameter values that exist in the database, for the corpus and
+    analytics queries."""
+    cursor = conn.cursor()
+    last_order = cursor.execute('SELECT MAX(order_date) FROM orders').fetchone()[0] or '2000-01-01'
+    return {
+        **default_params(conn),
+        'user_id': cursor.execute(
+            'SELECT user_id FROM orders ORDER BY order_id LIMIT 1').fetchone()[0],
+        'product_id': cursor.execute(
+            'SELECT product_id FROM order_items ORDER BY order_item_id LIMIT 1').fetchone()[0],
+        'category_id': cursor.execute(
+            'SELECT category_id FROM products ORDER BY product_id LIMIT 1').fetchone()[0],
+        'since': cursor.execute("SELECT date(?, '-30 days')", (last_order,)).fetchone()[0],
+    }
+
+
+def full_scans(conn, sql, params):
+    """Return the tables a query reads without any index, per EXPLAIN QUERY PLAN."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    aliases = {name: name for name in tables}
+    for table, alias in TABLE_ALIAS.findall(sql):
+        if table in tables and alias:
+            aliases.setdefault(alias, table)
+    scans = []
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params):
+        match = SCAN.match(row[3])
+        if match and match.group(1) in aliases and 'INDEX' not in match.group(2):
+            scans.append(aliases[match.group(1)])
+    return scans
+
+
+def time_query(conn, sql, params, repeat=3):
+    """Best of `repeat` runs, in seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(conn, queries=QUERIES, repeat=3):
+    """Return {name: (full scans, seconds)} for each query."""
+    params = sample_params(conn)
+    return {name: (full_scans(conn, sql, params), time_query(conn, sql, params, repeat))
+            for name, sql in queries.items()}
+
+
+def compare(conn, queries=QUERIES, repeat=3):
+    """Time the corpus without and then with the workload indexes; the
+    database is left with the indexes applied."""
+    revert_indexes(conn)
+    before = report(conn, queries, repeat)
+    apply_indexes(conn)
+    after = report(conn, queries, repeat)
+    rows = []
+    for name in queries:
+        (scans_before, seconds_before), (scans_after, seconds_after) = before[name], after[name]
+        rows.append([name, ', '.join(scans_before) or '-', f"{seconds_before * 1000:.2f}",
+                     ', '.join(scans_after) or '-', f"{seconds_after * 1000:.2f}",
+                     f"{seconds_before / max(seconds_after, 1e-9):.1f}x"])
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report full table scans in the query workload.")
+    parser.add_argument('--db', default='ecommerce.db')
+    parser.add_argument('--compare', action='store_true',
+                        help="time every query without and with the workload indexes")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per query; the best is kept")
+    parser.add_argument('--problems', action='store_true',
+                        help="check the analytics.py problem queries instead of the corpus")
+    args = parser.parse_args()
+
+    queries = QUERIES
+    if args.problems:
+        queries = {f"{number}. {p.name}": p.sql for number, p in sorted(PROBLEMS.items())}
+    # --compare drops and recreates the indexes; the plain report only reads.
+    conn = connect(args.db, read_only=not args.compare)
+    try:
+        if args.compare:
+            print(tabulate(compare(conn, queries, args.repeat),
+                           headers=['Query', 'Scans before', 'ms before', 'Scans after', 'ms after',
+                                    'Speedup'],
+                           tablefmt='grid'))
+        else:
+            results = report(conn, queries, args.repeat)
+            print(tabulate([[name, ', '.join(scans) or '-', f"{seconds * 1000:.2f}"]
+                            for name, (scans, seconds) in results.items()],
+                           headers=['Query', 'Full scans', 'ms'], tablefmt='grid'))
+            remaining = sum(1 for scans, _ in results.values() if scans)
+            print(f"{remaining} of {len(results)} queries still scan a table")
+    finally:
+        conn.close()
@@ -0,0 +1,358 @@
+import argparse
+import time
+
+from tabulate import tabulate
+
+from db import connect, differs, exit_with_report
+
+# Summary tables kept current by triggers on orders, order_items and
+# products, so dashboard reads touch one row per group instead of every
+# order. Each entry is (CREATE TABLE, key columns, value columns, the SELECT
+# that recomputes the table from scratch).
+ROLLUPS = {
+    'user_stats': ('''
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        orders INTEGER NOT NULL,
+        total_spent REAL NOT NULL,
+        first_order TIMESTAMP,
+        last_order TIMESTAMP
+    )
+    ''', ('user_id',), ('orders', 'total_spent', 'first_order', 'last_order'), '''
+    SELECT user_id, COUNT(*), SUM(total_amount), MIN(order_date), MAX(order_date)
+    FROM orders
+    GROUP BY user_id
+    '''),
+    'product_daily_sales': ('''
+    CREATE TABLE IF NOT EXISTS product_daily_sales (
+        product_id INTEGER NOT NULL,
+        day DATE NOT NULL,
+        lines INTEGER NOT NULL,
+        units INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        PRIMARY KEY (product_id, day)
+    )
+    ''', ('product_id', 'day'), ('lines', 'units', 'revenue'), '''
+    SELECT oi.product_id, date(o.order_date), COUNT(*), SUM(oi.quantity), SUM(oi.total_price)
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+    GROUP BY oi.product_id, date(o.order_date)
+    '''),
+    'category_monthly_revenue': ('''
+    CREATE TABLE IF NOT EXISTS category_monthly_revenue (
+        category_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        units INTEGER NOT NULL,
+        revenue REAL NOT NULL,
+        PRIMARY KEY (category_id, month)
+    )
+    ''', ('category_id', 'month'), ('units', 'revenue'), '''
+    SELECT p.category_id, strftime('%Y-%m', o.order_date), SUM(oi.quantity), SUM(oi.total_price)
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+    JOIN products p ON p.product_id = oi.product_id
+    GROUP BY p.category_id, strftime('%Y-%m', o.order_date)
+    '''),
+}
+
+ROLLUP_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_user_stats_spent ON user_stats(total_spent)',
+    'CREATE INDEX IF NOT EXISTS idx_product_daily_sales_day ON product_daily_sales(day)',
+    'CREATE INDEX IF NOT EXISTS idx_category_monthly_revenue_month ON category_monthly_revenue(month)',
+]
+
+UPSERT_DAILY = '''
+    ON CONFLICT (product_id, day) DO UPDATE
+    SET lines = lines + excluded.lines, units = units + excluded.units,
+        revenue = revenue + excluded.revenue;'''
+UPSERT_MONTHLY = '''
+    ON CONFLICT (category_id, month) DO UPDATE
+    SET units = units + excluded.units, revenue = revenue + excluded.revenue;'''
+
+
+def item_delta(row, sign):
+    """Trigger statements adding (sign '') or removing (sign '-') one order_items row."""
+    return f'''
+    INSERT INTO product_daily_sales (product_id, day, lines, units, revenue)
+    SELECT {row}.product_id, date(o.order_date), {sign}1, {sign}{row}.quantity, {sign}{row}.total_price
+    FROM orders o WHERE o.order_id = {row}.order_id
+    {UPSERT_DAILY}
+    INSERT INTO category_monthly_revenue (category_id, month, units, revenue)
+    SELECT p.category_id, strftime('%Y-%m', o.order_date), {sign}{row}.quantity, {sign}{row}.total_price
+    FROM orders o JOIN products p ON p.product_id = {row}.product_id
+    WHERE o.order_id = {row}.order_id
+    {UPSERT_MONTHLY}'''
+
+
+def order_items_delta(row, sign):
+    """Trigger statements adding or removing all items of an order, dated {row}.order_date."""
+    return f'''
+    INSERT INTO product_daily_sales (product_id, day, lines, units, revenue)
+    SELECT product_id, date({row}.order_date), {sign}COUNT(*), {sign}SUM(quantity), {sign}SUM(total_price)
+    FROM order_items WHERE order_id = {row}.order_id
+    GROUP BY product_id
+    {UPSERT_DAILY}
+    INSERT INTO category_monthly_revenue (category_id, month, units, revenue)
+    SELECT p.category_id, strftime('%Y-%m', {row}.order_date), {sign}SUM(oi.quantity), {sign}SUM(oi.total_price)
+    FROM order_items oi JOIN products p ON p.product_id = oi.product_id
+    WHERE oi.order_id = {row}.order_id
+    GROUP BY p.category_id
+    {UPSERT_MONTHLY}'''
+
+
+ADD_ORDER = '''
+    INSERT INTO user_stats (user_id, orders, total_spent, first_order, last_order)
+    VALUES (NEW.user_id, 1, NEW.total_amount, NEW.order_date, NEW.order_date)
+    ON CONFLICT (user_id) DO UPDATE
+    SET orders = orders + 1, total_spent = total_spent + excluded.total_spent,
+        first_order = MIN(first_order, excluded.first_order),
+        last_order = MAX(last_order, excluded.last_order);'''
+
+# The first and last order of a user cannot be decremented, so they are
+# looked up again through idx_orders_user_date.
+REMOVE_ORDER = '''
+    UPDATE user_stats
+    SET orders = orders - 1, total_spent = total_spent - OLD.total_amount,
+        first_order = (SELECT MIN(order_date) FROM orders WHERE user_id = OLD.user_id),
+        last_order = (SELECT MAX(order_date) FROM orders WHERE user_id = OLD.user_id)
+    WHERE user_id = OLD.user_id;
+    DELETE FROM user_stats WHERE user_id = OLD.user_id AND orders = 0;'''
+
+DROP_EMPTY_ITEM_ROWS = '''
+    DELETE FROM product_daily_sales WHERE product_id = OLD.product_id AND lines = 0;
+    DELETE FROM category_monthly_revenue WHERE units = 0
+      AND category_id = (SELECT category_id FROM products WHERE product_id = OLD.product_id);'''
+
+DROP_EMPTY_ORDER_ROWS = '''
+    DELETE FROM product_daily_sales WHERE day = date(OLD.order_date) AND lines = 0;
+    DELETE FROM category_monthly_revenue
+    WHERE month = strftime('%Y-%m', OLD.order_date) AND units = 0;'''
+
+TRIGGERS = {
+    'rollup_orders_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_orders_insert AFTER INSERT ON orders
+    BEGIN {ADD_ORDER}
+    END''',
+    'rollup_orders_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_orders_delete AFTER DELETE ON orders
+    BEGIN {REMOVE_ORDER} {order_items_delta('OLD', '-')} {DROP_EMPTY_ORDER_ROWS}
+    END''',
+    'rollup_orders_update': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_orders_update
+    AFTER UPDATE OF user_id, total_amount, order_date ON orders
+    BEGIN {REMOVE_ORDER} {ADD_ORDER}
+    END''',
+    # Items stay in the rollups under their order's date, so move them
+    # when that date changes.
+    'rollup_orders_redate': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_orders_redate AFTER UPDATE OF order_date ON orders
+    WHEN OLD.order_date IS NOT NEW.order_date
+    BEGIN {order_items_delta('OLD', '-')} {order_items_delta('NEW', '')} {DROP_EMPTY_ORDER_ROWS}
+    END''',
+    'rollup_order_items_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_order_items_insert AFTER INSERT ON order_items
+    BEGIN {item_delta('NEW', '')}
+    END''',
+    'rollup_order_items_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_order_items_delete AFTER DELETE ON order_items
+    BEGIN {item_delta('OLD', '-')} {DROP_EMPTY_ITEM_ROWS}
+    END''',
+    'rollup_order_items_update': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_order_items_update
+    AFTER UPDATE OF order_id, product_id, quantity, total_price ON order_items
+    BEGIN {item_delta('OLD', '-')} {item_delta('NEW', '')} {DROP_EMPTY_ITEM_ROWS}
+    END''',
+    'rollup_products_recategorise': f'''
+    CREATE TRIGGER IF NOT EXISTS rollup_products_recategorise AFTER UPDATE OF category_id ON products
+    WHEN OLD.category_id IS NOT NEW.category_id
+    BEGIN
+    INSERT INTO category_monthly_revenue (category_id, month, units, revenue)
+    SELECT OLD.category_id, substr(day, 1, 7), -SUM(units), -SUM(revenue)
+    FROM product_daily_sales WHERE product_id = OLD.product_id
+    GROUP BY substr(day, 1, 7)
+    {UPSERT_MONTHLY}
+    INSERT INTO category_monthly_revenue (category_id, month, units, revenue)
+    SELECT NEW.category_id, substr(day, 1, 7), SUM(units), SUM(revenue)
+    FROM product_daily_sales WHERE product_id = NEW.product_id
+    GROUP BY substr(day, 1, 7)
+    {UPSERT_MONTHLY}
+    DELETE FROM category_monthly_revenue WHERE category_id = OLD.category_id AND units = 0;
+    END''',
+}
+
+# Reads served from the rollups. Each touches one row per group.
+DASHBOARD_QUERIES = {
+    'top_customers': '''
+    SELECT us.user_id, u.username, us.orders, ROUND(us.total_spent, 2) AS total_spent,
+           us.first_order, us.last_order
+    FROM user_stats us
+    JOIN users u ON u.user_id = us.user_id
+    ORDER BY us.total_spent DESC
+    LIMIT :limit
+    ''',
+    'monthly_item_revenue': '''
+    SELECT month, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue
+    FROM category_monthly_revenue
+    WHERE month >= strftime('%Y-%m', :since)
+    GROUP BY month
+    ORDER BY month
+    ''',
+    'category_revenue': '''
+    SELECT c.category_name, SUM(cm.units) AS units, ROUND(SUM(cm.revenue), 2) AS revenue
+    FROM category_monthly_revenue cm
+    JOIN categories c ON c.category_id = cm.category_id
+    GROUP BY cm.category_id
+    ORDER BY revenue DESC
+    ''',
+    'top_products_since': '''
+    SELECT product_id, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue
+    FROM product_daily_sales
+    WHERE day >= date(:since)
+    GROUP BY product_id
+    ORDER BY revenue DESC
+    LIMIT :limit
+    ''',
+}
+
+
+def installed(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'"
+                        ).fetchone() is not None
+
+
+def rebuild(conn):
+    """Recompute every rollup from the base tables in one pass each."""
+    for name, (_, keys, values, recompute) in ROLLUPS.items():
+        conn.execute(f'DELETE FROM {name}')
+        conn.execute(f'INSERT INTO {name} ({", ".join(keys + values)}) {recompute}')
+    conn.commit()
+
+
+def install(conn):
+    """Create the rollup tables and triggers and fill the tables."""
+    for ddl, _, _, _ in ROLLUPS.values():
+        conn.execute(ddl)
+    for sql in ROLLUP_INDEXES:
+        conn.execute(sql)
+    for sql in TRIGGERS.values():
+        conn.execute(sql)
+    rebuild(conn)
+
+
+def uninstall(conn):
+    for name in TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    for name in ROLLUPS:
+        conn.execute(f'DROP TABLE IF EXISTS {name}')
+    conn.commit()
+
+
+def apply_delta(conn, first_order_id):
+    """Add orders from first_order_id on, and their items, to the rollups.
+
+    For bulk loads that append orders with the triggers dropped: one grouped
+    pass over the new rows instead of a trigger call per row.
+    """
+    params = {'first': first_order_id}
+    conn.execute('''
+    INSERT INTO user_stats (user_id, orders, total_spent, first_order, last_order)
+    SELECT user_id, COUNT(*), SUM(total_amount), MIN(order_date), MAX(order_date)
+    FROM orders WHERE order_id >= :first
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO UPDATE
+    SET orders = orders + excluded.orders, total_spent = total_spent + excluded.total_spent,
+        first_order = MIN(first_order, excluded.first_order),
+        last_order = MAX(last_order, excluded.last_order)
+    ''', params)
+    conn.execute(f'''
+    INSERT INTO product_daily_sales (product_id, day, lines, units, revenue)
+    SELECT oi.product_id, date(o.order_date), COUNT(*), SUM(oi.quantity), SUM(oi.total_price)
+    FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+    WHERE oi.order_id >= :first
+    GROUP BY oi.product_id, date(o.order_date)
+    {UPSERT_DAILY}
+    ''', params)
+    conn.execute(f'''
+    INSERT INTO category_monthly_revenue (category_id, month, units, revenue)
+    SELECT p.category_id, strftime('%Y-%m', o.order_date), SUM(oi.quantity), SUM(oi.total_price)
+    FROM order_items oi
+    JOIN orders o ON o.order_id = oi.order_id
+    JOIN products p ON p.product_id = oi.product_id
+    WHERE oi.order_id >= :first
+    GROUP BY p.category_id, strftime('%Y-%m', o.order_date)
+    {UPSERT_MONTHLY}
+    ''', params)
+    conn.commit()
+
+
+def verify(conn):
+    """Compare every rollup with a full recomputation.
+
+    Returns {rollup: number of mismatched, missing or extra rows}.
+    """
+    mismatches = {}
+    for name, (_, keys, values, recompute) in ROLLUPS.items():
+        columns = keys + values
+        join = ' AND '.join(f'a.{key} IS b.{key}' for key in keys)
+        changed = ' OR '.join(differs(f'a.{value}', f'b.{value}') for value in values)
+        expected = f'expected ({", ".join(columns)}) AS ({recompute})'
+        missing = conn.execute(f'''
+        WITH {expected}
+        SELECT COUNT(*) FROM expected a LEFT JOIN {name} b ON {join}
+        WHERE b.{keys[0]} IS NULL OR {changed}
+        ''').fetchone()[0]
+        extra = conn.execute(f'''
+        WITH {expected}
+        SELECT COUNT(*) FROM {name} a
+        WHERE NOT EXISTS (SELECT 1 FROM expected b WHERE {join})
+        ''').fetchone()[0]
+        mismatches[name] = missing + extra
+    return mismatches
+
+
+def dashboard(conn, limit=10, since=None):
+    """Run DASHBOARD_QUERIES; return {name: (columns, rows, seconds)}."""
+    if since is None:
+        since = conn.execute("SELECT date(MAX(order_date), '-6 months') FROM orders").fetchone()[0]
+    results = {}
+    for name, sql in DASHBOARD_QUERIES.items():
+        started = time.perf_counter()
+        cursor = conn.execute(sql, {'limit': limit, 'since': since})
+        rows = cursor.fetchall()
+        results[name] = ([column[0] for column in cursor.description], rows,
+                         time.perf_counter() - started)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the ecommerce.db summary tables.")
+    parser.add_argument('--db', default='ecommerce.db')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--install', action='store_true', help="create, fill and start maintaining")
+    action.add_argument('--rebuild', action='store_true', help="recompute from the base tables")
+    action.add_argument('--verify', action='store_true', help="compare with a full recomputation")
+    action.add_argument('--uninstall', action='store_true', help="drop the tables and triggers")
+    args = parser.parse_args()
+
+    conn = connect(args.db, read_only=not (args.install or args.rebuild or args.uninstall))
+    started = time.perf_counter()
+    try:
+        if args.install:
+            install(conn)
+            print(f"Rollups installed in {time.perf_counter() - started:.2f}s")
+        elif args.rebuild:
+            rebuild(conn)
+            print(f"Rollups rebuilt in {time.perf_counter() - started:.2f}s")
+        elif args.verify:
+            exit_with_report(verify(conn), ['Rollup', 'Mismatched rows'])
+        elif args.uninstall:
+            uninstall(conn)
+            print("Rollups removed")
+        elif not installed(conn):
+            raise SystemExit("Rollups are not installed; run with --install first.")
+        else:
+            for name, (columns, rows, seconds) in dashboard(conn).items():
+                print(f"\n=== {name.upper()} ({seconds * 1000:.2f} ms) ===")
+                print(tabulate(rows, headers=columns, tablefmt='grid'))
+    finally:
+        conn.close()
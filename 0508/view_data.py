@@ -1,17 +1,16 @@
-import sqlite3
 from tabulate import tabulate
 
-def view_data():
-    conn = sqlite3.connect('ecommerce.db')
+from db import DEFAULT_DB, connect, row_count, sample_rows
+
+def view_data(db_path=DEFAULT_DB):
+    conn = connect(db_path, read_only=True)
     cursor = conn.cursor()
 
     def print_table_data(table_name, limit=5):
         print(f"\n=== Sample Data from {table_name.upper()} table ===")
-        cursor.execute(f"SELECT * FROM {table_name} LIMIT {limit}")
-        columns = [description[0] for description in cursor.description]
-        rows = cursor.fetchall()
+        columns, rows = sample_rows(conn, table_name, limit)
         print(tabulate(rows, headers=columns, tablefmt='grid'))
-        print(f"Total records in {table_name}: ", cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0])
+        print(f"Total records in {table_name}: ", row_count(conn, table_name))
 
     # 1. View Categories
     print("\n=== CATEGORIES TREE ===")
@@ -48,17 +47,16 @@ def view_data():
                   headers=['ID', 'Product', 'Category', 'Price', 'Stock', 'Rating', '# Reviews'],
                   tablefmt='grid'))
 
-    # 4. View Orders
+    # 4. View Orders (pick the 5 newest with items first so only they are joined and counted)
     cursor.execute('''
     SELECT o.order_id, o.order_number, u.username,
            o.total_amount, o.order_status, o.payment_status,
-           COUNT(oi.order_item_id) as items
-    FROM orders o
+           (SELECT COUNT(*) FROM order_items oi WHERE oi.order_id = o.order_id) as items
+    FROM (SELECT * FROM orders
+          WHERE EXISTS (SELECT 1 FROM order_items oi WHERE oi.order_id = orders.order_id)
+          ORDER BY order_date DESC LIMIT 5) o
     JOIN users u ON o.user_id = u.user_id
-    JOIN order_items oi ON o.order_id = oi.order_id
-    GROUP BY o.order_id
     ORDER BY o.order_date DESC
-    LIMIT 5
     ''')
     print("\n=== RECENT ORDERS ===")
     print(tabulate(cursor.fetchall(),
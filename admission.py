@@ -0,0 +1,172 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+# Rough unit costs measured on one core; they only need to be right to
+# within a small factor to tell cheap requests from expensive ones.
+SIEVE_SECONDS_PER_NUMBER = 7e-9
+SERIALIZE_SECONDS_PER_ITEM = 2e-7
+PRIME_PI_SECONDS_PER_UNIT = 3e-9  # per x ** 0.75
+# Converting a d-digit int to decimal, or a step of the fast-doubling
+# recurrence on d-digit ints, is sub-quadratic: about this times d ** 1.6.
+BIGINT_SECONDS_PER_UNIT = 1.4e-9
+# A buffered item costs a list slot, an int object and its JSON text.
+BUFFERED_BYTES_PER_ITEM = 8 + 32
+
+Estimate = namedtuple('Estimate', 'items body_bytes memory_bytes seconds')
+
+
+def estimate_cost(choice, limit, op='list'):
+    """Estimate the output size and CPU time of a /numbers query.
+
+    choice is a classifier code: '1' (primes), '2'/'3' (evens/odds, closed
+    form) or any other code, which is costed like a sieve over [1, limit].
+    For op 'nth', limit is n; for op 'select', limit is the width of the
+    range. memory_bytes is what one buffered response would hold at peak.
+    """
+    limit = max(int(limit), 0)
+    if op == 'count':
+        if choice == '1':
+            seconds = PRIME_PI_SECONDS_PER_UNIT * limit ** 0.75
+        elif choice in ('2', '3'):
+            seconds = 0.0
+        else:
+            seconds = SIEVE_SECONDS_PER_NUMBER * limit
+        return Estimate(1, 32, 0, seconds)
+    if op == 'nth':
+        if choice != '1':
+            return Estimate(1, 32, 0, 0.0)
+        x = limit * math.log(max(limit, 3)) * 1.2
+        return Estimate(1, 32, 0, PRIME_PI_SECONDS_PER_UNIT * x ** 0.75)
+    if op == 'select':
+        items = limit / 2
+        sieve = SIEVE_SECONDS_PER_NUMBER * limit
+    elif choice in ('2', '3'):
+        items = limit / 2
+        sieve = 0.0
+    else:
+        items = limit / math.log(limit) if limit > 2 else min(limit, 1)
+        sieve = SIEVE_SECONDS_PER_NUMBER * limit
+    body_bytes = items * (len(str(limit)) + 1)
+    return Estimate(int(items), int(body_bytes),
+                    int(items * BUFFERED_BYTES_PER_ITEM + body_bytes),
+                    sieve + SERIALIZE_SECONDS_PER_ITEM * items)
+
+
+def estimate_fibonacci(start, stop, mod=None):
+    """Estimate the cost of a /fibonacci query for F(start)..F(stop).
+
+    Exact terms have about 0.209 * stop decimal digits, and each is held as
+    an int, as its decimal text and in the body. Terms modulo mod have at
+    most as many digits as mod, but fast doubling takes one step per bit of
+    start to reach the first of them.
+    """
+    terms = stop - start + 1
+    if mod is None:
+        digits = 0.209 * stop + 1
+        # Reaching F(start) from a checkpoint costs about one more term.
+        steps = terms + 1
+    else:
+        digits = mod.bit_length() * 0.30103 + 1
+        steps = terms + 2 * start.bit_length()
+    body_bytes = terms * (digits + 3)
+    # An int takes 0.415 bytes per decimal digit; its text one byte per digit.
+    memory_bytes = terms * (BUFFERED_BYTES_PER_ITEM + digits * 0.415 + digits) + body_bytes
+    return Estimate(terms, int(body_bytes), int(memory_bytes),
+                    steps * BIGINT_SECONDS_PER_UNIT * digits ** 1.6
+                    + SERIALIZE_SECONDS_PER_ITEM * terms)
+
+
+def estimate_page(choice, limit, offset, size, after=None):
+    """Estimate the cost of one /numbers page of size items from index offset.
+
+    Prime pages first locate their start with nth_prime(offset + 1), which
+    is prime counting near that prime, unless a cursor gives the previous
+    prime (after). The window itself is then sieved with base primes up to
+    the square root of its end. Evens and odds pages are index arithmetic.
+    """
+    offset, size = max(int(offset), 0), max(int(size), 0)
+    if choice != '1':
+        body_bytes = size * (len(str(max(int(limit), 0))) + 1)
+        return Estimate(size, body_bytes, size * BUFFERED_BYTES_PER_ITEM + body_bytes,
+                        SERIALIZE_SECONDS_PER_ITEM * size)
+    seconds = memory = 0
+    if after is None:
+        n = offset + 1
+        x = n * math.log(max(n, 3)) * 1.2
+        if offset:
+            seconds += estimate_cost('1', n, 'nth').seconds
+            # prime_pi keeps three int64 arrays of sqrt(x) entries.
+            memory += 24 * math.isqrt(int(x))
+    else:
+        x = max(int(after), 0)
+    x = min(x, max(int(limit), 0))
+    width = max(4096, size * math.log(max(x, 3)) * 1.25)
+    root = math.isqrt(int(x + width))
+    # Base primes: a flag per number up to root, then a Python int per prime.
+    memory += root + root / math.log(max(root, 3)) * 44 + width / 2
+    seconds += SIEVE_SECONDS_PER_NUMBER * (root + width) + SERIALIZE_SECONDS_PER_ITEM * size
+    body_bytes = size * (len(str(int(x + width))) + 1)
+    return Estimate(size, int(body_bytes), int(memory + size * BUFFERED_BYTES_PER_ITEM + body_bytes),
+                    seconds)
+
+class FairGate:
+    """Bounded set of slots for heavy requests, handed out fairly per client.
+
+    When all slots are busy, waiters queue per client and freed slots go to
+    the clients in round-robin order, so one client sending many heavy
+    requests cannot starve the others. At most max_waiting requests wait;
+    further ones are refused straight away.
+    """
+
+    def __init__(self, slots, max_waiting):
+        self.slots = slots
+        self.max_waiting = max_waiting
+        self.waiting = 0
+        self._free = slots
+        self._queues = OrderedDict()
+        self._cond = threading.Condition()
+
+    def _next_ticket(self):
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _drop(self, client, ticket):
+        queue = self._queues[client]
+        queue.remove(ticket)
+        if queue:
+            self._queues.move_to_end(client)
+        else:
+            del self._queues[client]
+        self.waiting -= 1
+
+    def acquire(self, client, timeout):
+        """Take a slot for client, waiting up to timeout seconds; return success."""
+        with self._cond:
+            if self._free and not self._queues:
+                self._free -= 1
+                return True
+            if self.waiting >= self.max_waiting:
+                return False
+            ticket = object()
+            self._queues.setdefault(client, deque()).append(ticket)
+            self.waiting += 1
+            deadline = time.monotonic() + timeout
+            while not (self._free and self._next_ticket() is ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._drop(client, ticket)
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+            self._drop(client, ticket)
+            self._free -= 1
+            self._cond.notify_all()
+            return True
+
+    def release(self):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
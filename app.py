@@ -1,38 +1,516 @@
+import os
+import time
 
-from flask import Flask, request, jsonify
-from prime import is_prime
-from even import is_even
-from odd import is_odd
+import numpy as np
+from flask import Flask, Response, g, request, jsonify
+from sieve import iter_prime_segments
+from parallel_sieve import default_workers
+from prime_cache import DEFAULT_MAX_BYTES, PrimeTable
+from response_cache import ResponseCache, response_etag
+from admission import Estimate, FairGate, estimate_cost, estimate_fibonacci, estimate_page
+from fibonacci import DEFAULT_CHECKPOINT_BYTES, FibonacciCheckpoints, fib_mod, to_decimal
+from classifiers import choices, count_matching, iter_select, lookup, select
+from metrics import SIZE_BUCKETS, Counter, Gauge, Histogram, Registry, SlowestRequests
+from prime_count import nth_prime, prime_pi
+from paging import decode_cursor, encode_cursor, prime_window, range_window
+from even import count_evens, even_range
+from odd import count_odds, odd_range
 
 app = Flask(__name__)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# Numbers per streamed chunk; bounds the memory held by a streaming response.
+STREAM_CHUNK_SIZE = 1 << 16
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 100_000
+MAX_BATCH_QUERIES = 1000
+MAX_SELECT_CLASSIFIERS = 8
+MAX_FIB_INDEX = int(os.environ.get('FIB_MAX_INDEX', 1_000_000))
+MAX_FIB_RANGE = 10_000
+# Values at or above 2**53 are sent as decimal strings so JSON clients keep every digit.
+JSON_SAFE_INT = 1 << 53
+# Admission control: requests estimated to take longer than
+# MAX_REQUEST_SECONDS are refused, buffered answers larger than
+# MAX_BUFFERED_BYTES are streamed instead, and requests above HEAVY_SECONDS
+# share HEAVY_SLOTS slots, queueing fairly per client.
+MAX_REQUEST_SECONDS = float(os.environ.get('NUMBERS_MAX_REQUEST_SECONDS', 30))
+MAX_BUFFERED_BYTES = int(os.environ.get('NUMBERS_MAX_BUFFERED_BYTES', 256 << 20))
+HEAVY_SECONDS = float(os.environ.get('NUMBERS_HEAVY_SECONDS', 0.25))
+HEAVY_QUEUE_TIMEOUT = float(os.environ.get('NUMBERS_HEAVY_QUEUE_TIMEOUT', 30))
+# Heavy slots are shared fairly per client address. Only these proxy
+# addresses (comma separated) may name the client with X-Client-Id.
+TRUSTED_PROXIES = frozenset(filter(None, os.environ.get('NUMBERS_TRUSTED_PROXIES', '').split(',')))
+
+prime_table = PrimeTable(
+    max_bytes=int(os.environ.get('PRIME_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+    path=os.environ.get('PRIME_CACHE_PATH'),
+    workers=default_workers(),
+)
+response_cache = ResponseCache(
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 << 20)),
+)
+
+fib_checkpoints = FibonacciCheckpoints(
+    max_bytes=int(os.environ.get('FIB_CHECKPOINT_MAX_BYTES', DEFAULT_CHECKPOINT_BYTES)),
+)
+heavy_gate = FairGate(
+    slots=int(os.environ.get('NUMBERS_HEAVY_SLOTS', max(1, (os.cpu_count() or 2) // 2))),
+    max_waiting=int(os.environ.get('NUMBERS_HEAVY_QUEUE', 64)),
+)
+
+metrics = Registry()
+request_latency = metrics.add(Histogram(
+    'numbers_request_duration_seconds', 'Time to answer /numbers requests.', ['endpoint', 'choice']))
+response_size = metrics.add(Histogram(
+    'numbers_response_size_bytes', 'Size of buffered /numbers response bodies.', ['endpoint'],
+    buckets=SIZE_BUCKETS))
+bytes_served = metrics.add(Counter(
+    'numbers_response_bytes_total', 'Bytes of buffered /numbers response bodies served.', ['endpoint']))
+in_flight = metrics.add(Gauge(
+    'numbers_requests_in_flight', '/numbers requests being handled right now.'))
+rejected = metrics.add(Counter(
+    'numbers_requests_rejected_total', '/numbers requests answered with an error status.',
+    ['endpoint', 'status']))
+downgraded = metrics.add(Counter(
+    'numbers_requests_downgraded_total', '/numbers requests streamed because they were too big to buffer.'))
+cache_stats = metrics.add(Gauge(
+    'numbers_response_cache', 'Response cache entries, bytes, hits and misses.', ['stat']))
+# Opt-in profiler: NUMBERS_PROFILE_SLOWEST=N keeps the N slowest of every
+# NUMBERS_PROFILE_SAMPLE_EVERY-th request, with their cProfile summaries.
+slowest = None
+if int(os.environ.get('NUMBERS_PROFILE_SLOWEST', 0)):
+    slowest = SlowestRequests(int(os.environ['NUMBERS_PROFILE_SLOWEST']),
+                              int(os.environ.get('NUMBERS_PROFILE_SAMPLE_EVERY', 1)))
+
+@app.before_request
+def start_request_metrics():
+    if not request.path.startswith(('/numbers', '/fibonacci')):
+        return
+    g.started = time.perf_counter()
+    g.profiler = slowest.start() if slowest else None
+    in_flight.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'started' not in g:
+        return response
+    duration = time.perf_counter() - g.started
+    data = request.get_json(silent=True)
+    # Label by route and classifier code so clients cannot mint new series.
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    classifier = lookup(data.get('choice', '')) if isinstance(data, dict) else None
+    request_latency.observe(duration, (endpoint, classifier.code if classifier else 'other'))
+    if response.status_code >= 400:
+        rejected.inc((endpoint, response.status_code))
+    if not response.is_streamed:
+        size = response.calculate_content_length() or 0
+        response_size.observe(size, (endpoint,))
+        bytes_served.inc((endpoint,), size)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        slowest.finish(profiler, duration, data)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'started' not in g:
+        return
+    in_flight.dec()
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    for stat, value in response_cache.stats().items():
+        cache_stats.set(value, (stat,))
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/slowest', methods=['GET'])
+def slowest_requests():
+    if slowest is None:
+        return jsonify({'error': 'Set NUMBERS_PROFILE_SLOWEST to record the slowest requests.'}), 404
+    return jsonify({'requests': slowest.entries()})
+
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({'status': 'ok'})
 
 def get_primes(limit):
-    return [num for num in range(2, limit + 1) if is_prime(num)]
+    return prime_table.primes(limit).tolist()
 
 def get_evens(limit):
-    return [num for num in range(2, limit + 1) if is_even(num)]
+    return list(even_range(limit))
 
 def get_odds(limit):
-    return [num for num in range(1, limit + 1) if is_odd(num)]
+    return list(odd_range(limit))
+
+def iter_primes(limit):
+    """Yield the primes up to limit in chunks of at most STREAM_CHUNK_SIZE."""
+    for segment in iter_prime_segments(2, limit):
+        for i in range(0, len(segment), STREAM_CHUNK_SIZE):
+            yield segment[i:i + STREAM_CHUNK_SIZE].tolist()
+
+def iter_range(numbers):
+    """Yield a range in list chunks of at most STREAM_CHUNK_SIZE."""
+    for i in range(0, len(numbers), STREAM_CHUNK_SIZE):
+        yield list(numbers[i:i + STREAM_CHUNK_SIZE])
+
+def iter_evens(limit):
+    """Yield the evens up to limit in chunks of at most STREAM_CHUNK_SIZE."""
+    return iter_range(even_range(limit))
+
+def iter_odds(limit):
+    """Yield the odds up to limit in chunks of at most STREAM_CHUNK_SIZE."""
+    return iter_range(odd_range(limit))
+
+def iter_matching(name, limit):
+    """Yield the numbers in [1, limit] matching a classifier, as list chunks."""
+    for part in iter_select([name], 1, limit, STREAM_CHUNK_SIZE):
+        yield part.tolist()
+
+def list_engine(classifier):
+    """Return (get, iterate, describe) for the fastest way to list a classifier.
+
+    Primes come from the shared prime table, arithmetic classifiers from
+    their ranges, and everything else from the classifier's vectorised mask.
+    describe is None unless the answer has a compact range form.
+    """
+    if classifier.name == 'prime':
+        return get_primes, iter_primes, None
+    if classifier.range is not None:
+        return (lambda limit: list(classifier.range(limit)),
+                lambda limit: iter_range(classifier.range(limit)), classifier.range)
+    return (lambda limit: select([classifier.name], 1, limit).tolist(),
+            lambda limit: iter_matching(classifier.name, limit), None)
+
+def compact_range(numbers):
+    """Describe a range as {start, stop, step} instead of listing it."""
+    return {'start': numbers.start, 'stop': numbers.stop, 'step': numbers.step,
+            'count': len(numbers)}
+
+def ndjson_lines(chunks):
+    """Encode each chunk as one NDJSON line per number, one block per chunk."""
+    for chunk in chunks:
+        if chunk:
+            yield '\n'.join(map(str, chunk)) + '\n'
+
+def cache_key(limit, choice, fmt):
+    """Normalise a query so that requests with identical answers share a key."""
+    limit = max(limit, 0)
+    if choice == '2':
+        limit -= limit % 2
+    elif choice == '3' and limit:
+        limit -= 1 - limit % 2
+    return ('numbers', choice, limit, fmt)
+
+def wants_stream(data):
+    if data.get('stream'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def client_id():
+    if request.remote_addr in TRUSTED_PROXIES and request.headers.get('X-Client-Id'):
+        return request.headers['X-Client-Id']
+    return request.remote_addr or 'unknown'
+
+def admit(estimate):
+    """Return (error response or None, whether a heavy slot was taken)."""
+    if estimate.seconds > MAX_REQUEST_SECONDS:
+        return (jsonify({'error': 'Request too expensive; lower the limit.'}), 413), False
+    if estimate.seconds < HEAVY_SECONDS:
+        return None, False
+    if not heavy_gate.acquire(client_id(), HEAVY_QUEUE_TIMEOUT):
+        response = jsonify({'error': 'Too many heavy requests; retry later.'})
+        response.headers['Retry-After'] = '1'
+        return (response, 429), False
+    return None, True
+
+def numbers_page(data):
+    """Answer one window of a /numbers query, given offset/page_size or a cursor."""
+    if 'cursor' in data:
+        try:
+            state = decode_cursor(str(data['cursor']))
+            limit, classifier = int(state['limit']), lookup(state['choice'])
+            offset, after = int(state['offset']), state.get('after')
+            after = None if after is None else int(after)
+            page_size = int(data.get('page_size', state['page_size']))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Invalid cursor.'}), 400
+    else:
+        try:
+            limit = int(data.get('limit', 0))
+            offset, after = int(data.get('offset', 0)), None
+            page_size = int(data.get('page_size', DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit, offset and page_size must be integers.'}), 400
+        classifier = lookup(data.get('choice', ''))
+    if offset < 0 or not 0 < page_size <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'offset must be >= 0 and 0 < page_size <= {MAX_PAGE_SIZE}.'}), 400
+    if classifier is None:
+        return jsonify({'error': 'Invalid choice.'}), 400
+    if classifier.name != 'prime' and classifier.range is None:
+        return jsonify({'error': 'Paging is only available for primes, evens and odds.'}), 400
+    estimate = estimate_page(classifier.code, limit, offset, page_size, after)
+    if estimate.memory_bytes > MAX_BUFFERED_BYTES:
+        return jsonify({'error': 'Page too far out; lower the offset or follow next_cursor.'}), 413
+    error, heavy = admit(estimate)
+    if error:
+        return error
+    try:
+        if classifier.name == 'prime':
+            result = prime_window(limit, offset, page_size, after)
+            has_more = len(result) == page_size and result[-1] < limit
+        else:
+            numbers = classifier.range(limit)
+            result = range_window(numbers, offset, page_size)
+            has_more = offset + page_size < len(numbers)
+    finally:
+        if heavy:
+            heavy_gate.release()
+    next_cursor = None
+    if has_more:
+        state = {'limit': limit, 'choice': classifier.code, 'offset': offset + len(result),
+                 'page_size': page_size}
+        if classifier.name == 'prime':
+            state['after'] = result[-1]
+        next_cursor = encode_cursor(state)
+    return jsonify({'result': result, 'offset': offset, 'next_cursor': next_cursor})
+
+def numbers_query(op, classifier, data):
+    """Answer a count or nth query without listing the numbers.
+
+    count returns how many numbers up to limit match; nth returns the n-th
+    of them (1-based), ignoring limit. nth needs a closed form or, for
+    primes, prime counting; count falls back to the classifier's mask.
+    """
+    try:
+        value = int(data.get('limit', 0)) if op == 'count' else int(data['n'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer.' if op == 'count' else 'n must be an integer.'}), 400
+    if op == 'nth' and value < 1:
+        return jsonify({'error': 'n must be at least 1.'}), 400
+    if classifier is None:
+        return jsonify({'error': 'Invalid choice.'}), 400
+    if op == 'nth' and classifier.name not in ('prime', 'even', 'odd'):
+        return jsonify({'error': 'nth is only available for primes, evens and odds.'}), 400
+    error, heavy = admit(estimate_cost(classifier.code, value, op))
+    if error:
+        return error
+    try:
+        if classifier.name == 'prime':
+            result = prime_pi(value) if op == 'count' else nth_prime(value)
+        elif classifier.name == 'even':
+            result = count_evens(value) if op == 'count' else 2 * value
+        elif classifier.name == 'odd':
+            result = count_odds(value) if op == 'count' else 2 * value - 1
+        else:
+            result = count_matching([classifier.name], 1, value)
+    finally:
+        if heavy:
+            heavy_gate.release()
+    return jsonify({'result': result})
 
 @app.route('/numbers', methods=['POST'])
 def numbers():
     data = request.get_json()
-    limit = int(data.get('limit', 0))
-    choice = str(data.get('choice', ''))
-    if choice == '1':
-        result = get_primes(limit)
-    elif choice == '2':
-        result = get_evens(limit)
-    elif choice == '3':
-        result = get_odds(limit)
-    else:
+    if 'cursor' in data or 'page_size' in data or 'offset' in data:
+        return numbers_page(data)
+    op = data.get('op', 'list')
+    if op in ('count', 'nth'):
+        return numbers_query(op, lookup(data.get('choice', '')), data)
+    if op != 'list':
+        return jsonify({'error': 'Invalid op.'}), 400
+    try:
+        limit = int(data.get('limit', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer.'}), 400
+    classifier = lookup(data.get('choice', ''))
+    if classifier is None:
         return jsonify({'error': 'Invalid choice.'}), 400
+    choice = classifier.code
+    get, iterate, describe = list_engine(classifier)
+    fmt = data.get('format')
+    if fmt is not None and fmt != 'range':
+        return jsonify({'error': 'format must be "range" or absent.'}), 400
+    if fmt == 'range' and describe is None:
+        return jsonify({'error': 'The range format is only available for evens and odds.'}), 400
+    streaming = fmt != 'range' and wants_stream(data)
+    key = cache_key(limit, choice, fmt)
+    etag = response_etag(key)
+    if not streaming and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    body = None if streaming else response_cache.get(key)
+    if body is not None:
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
+
+    estimate = estimate_cost(choice, limit) if fmt != 'range' else estimate_cost(choice, 0)
+    if not streaming and estimate.memory_bytes > MAX_BUFFERED_BYTES:
+        streaming = True
+        downgraded.inc()
+    error, heavy = admit(estimate)
+    if error:
+        return error
+    if streaming:
+        response = Response(ndjson_lines(iterate(limit)), mimetype=NDJSON_MIMETYPE)
+        if heavy:
+            response.call_on_close(heavy_gate.release)
+        return response
+    try:
+        limit = key[2]
+        result = compact_range(describe(limit)) if fmt == 'range' else get(limit)
+        body = app.json.response({'result': result}).get_data()
+    finally:
+        if heavy:
+            heavy_gate.release()
+    response_cache.put(key, body)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+@app.route('/numbers/batch', methods=['POST'])
+def numbers_batch():
+    """Answer many (limit, choice) queries from one sieve up to the largest prime limit."""
+    queries = (request.get_json() or {}).get('queries')
+    if not isinstance(queries, list):
+        return jsonify({'error': 'queries must be a list.'}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch.'}), 400
+    parsed = []
+    for query in queries:
+        try:
+            classifier = lookup(query.get('choice', ''))
+            parsed.append((int(query.get('limit', 0)), classifier.code if classifier else None))
+        except (AttributeError, TypeError, ValueError):
+            parsed.append(None)
+    prime_limits = [q[0] for q in parsed if q is not None and q[1] == '1']
+    estimates = [estimate_cost(q[1], q[0]) for q in parsed
+                 if q is not None and q[1] is not None and q[1] != '1']
+    if prime_limits:
+        estimates.append(estimate_cost('1', max(prime_limits)))
+    if sum(e.memory_bytes for e in estimates) > MAX_BUFFERED_BYTES:
+        return jsonify({'error': 'Batch too large to buffer; split it or stream single queries.'}), 413
+    error, heavy = admit(Estimate(0, 0, 0, sum(e.seconds for e in estimates)))
+    if error:
+        return error
+    try:
+        primes = prime_table.primes(max(prime_limits)) if prime_limits else None
+        results = batch_results(parsed, primes)
+    finally:
+        if heavy:
+            heavy_gate.release()
+    return jsonify({'results': results})
+
+def batch_results(parsed, primes):
+    """Answer each parsed batch query, slicing primes from the shared array."""
+    results = []
+    for query in parsed:
+        if query is None:
+            results.append({'error': 'Invalid query.'})
+            continue
+        limit, choice = query
+        if choice is None:
+            results.append({'error': 'Invalid choice.'})
+        elif choice == '1':
+            results.append({'result': primes[:np.searchsorted(primes, limit, side='right')].tolist()})
+        else:
+            results.append({'result': list_engine(lookup(choice))[0](limit)})
+    return results
+
+@app.route('/numbers/select', methods=['POST'])
+def numbers_select():
+    """List the numbers in [start, stop] matching every given classifier.
+
+    The classifiers' masks are combined window by window as array
+    operations, e.g. {"classifiers": ["odd", "prime"], "start": 10, "stop": 99}.
+    """
+    data = request.get_json() or {}
+    names = data.get('classifiers')
+    if not isinstance(names, list) or not 0 < len(names) <= MAX_SELECT_CLASSIFIERS:
+        return jsonify({'error': f'classifiers must be a list of 1 to {MAX_SELECT_CLASSIFIERS} names.'}), 400
+    classifiers = [lookup(name) for name in names]
+    if None in classifiers:
+        return jsonify({'error': 'Unknown classifier.', 'available': list(choices().values())}), 400
+    try:
+        start, stop = int(data.get('start', 1)), int(data['stop'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'start and stop must be integers.'}), 400
+    start = max(start, 0)
+    estimate = estimate_cost('1', stop - start + 1, 'select')
+    if estimate.memory_bytes > MAX_BUFFERED_BYTES:
+        return jsonify({'error': 'Range too wide; narrow start..stop.'}), 413
+    error, heavy = admit(estimate)
+    if error:
+        return error
+    try:
+        result = select([c.name for c in classifiers], start, stop).tolist()
+    finally:
+        if heavy:
+            heavy_gate.release()
     return jsonify({'result': result})
 
+def fib_json(value):
+    return value if value < JSON_SAFE_INT else to_decimal(value)
+
+@app.route('/fibonacci', methods=['POST'])
+def fibonacci():
+    """Answer single-term, range and modular Fibonacci queries.
+
+    {"n": 100} gives F(100); {"start": 10, "stop": 20} gives F(10)..F(20);
+    adding "mod": m to either reduces the answers modulo m, which also lifts
+    the FIB_MAX_INDEX cap on the index. Exact queries start from the
+    nearest memoised checkpoint, and serialised answers share the
+    response cache with /numbers. Queries are costed and admitted the
+    same way as /numbers ones.
+    """
+    data = request.get_json() or {}
+    try:
+        mod = int(data['mod']) if 'mod' in data else None
+        if 'n' in data:
+            start = stop = int(data['n'])
+        else:
+            start, stop = int(data['start']), int(data['stop'])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return jsonify({'error': 'Give an integer n, or integer start and stop.'}), 400
+    if start < 0 or stop < start:
+        return jsonify({'error': 'Indexes must satisfy 0 <= start <= stop.'}), 400
+    if mod is not None and mod < 1:
+        return jsonify({'error': 'mod must be positive.'}), 400
+    if stop - start + 1 > MAX_FIB_RANGE:
+        return jsonify({'error': f'At most {MAX_FIB_RANGE} terms per request.'}), 400
+    if mod is None and stop > MAX_FIB_INDEX:
+        return jsonify({'error': f'Index above {MAX_FIB_INDEX}; use mod for larger indexes.'}), 413
+    key = ('fibonacci', start, stop, mod, 'n' in data)
+    body = response_cache.get(key)
+    if body is not None:
+        return Response(body, mimetype='application/json')
+    estimate = estimate_fibonacci(start, stop, mod)
+    if estimate.memory_bytes > MAX_BUFFERED_BYTES:
+        return jsonify({'error': 'Answer too large to buffer; ask for fewer terms.'}), 413
+    error, heavy = admit(estimate)
+    if error:
+        return error
+    try:
+        if mod is not None:
+            a = fib_mod(start, mod)
+            b = fib_mod(start + 1, mod)
+            values = []
+            for _ in range(start, stop + 1):
+                values.append(a)
+                a, b = b, (a + b) % mod
+        else:
+            values = fib_checkpoints.series(start, stop)
+        values = [fib_json(value) for value in values]
+    finally:
+        if heavy:
+            heavy_gate.release()
+    body = app.json.response({'result': values[0] if 'n' in data else values}).get_data()
+    response_cache.put(key, body)
+    return Response(body, mimetype='application/json')
+
 if __name__ == '__main__':
     app.run(debug=True)
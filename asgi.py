@@ -0,0 +1,184 @@
+# ASGI serving mode for /health and /numbers: run with `uvicorn asgi:app`.
+# Generation runs in a thread pool so /health stays responsive, and a
+# request's work stops at the next chunk once its deadline passes or the
+# client disconnects. Only plain listings are served here: op, paging and
+# format requests are refused with a 400 and are answered by app.py.
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from admission import estimate_cost
+from app import MAX_BUFFERED_BYTES, MAX_REQUEST_SECONDS, NDJSON_MIMETYPE, list_engine, ndjson_lines
+from classifiers import lookup
+
+DEFAULT_DEADLINE = float(os.environ.get('NUMBERS_DEADLINE_SECONDS', 30))
+MAX_DEADLINE = float(os.environ.get('NUMBERS_MAX_DEADLINE_SECONDS', 300))
+# /numbers fields that only the Flask app handles.
+UNSUPPORTED_FIELDS = ('offset', 'page_size', 'cursor', 'format')
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('NUMBERS_THREADS', 4)))
+
+
+class Cancelled(Exception):
+    """Raised inside a worker when its request was abandoned."""
+
+
+def generate(limit, classifier, cancelled):
+    """Build the JSON body for a /numbers query, checking cancelled between chunks."""
+    iterate = list_engine(classifier)[1]
+    parts = []
+    for chunk in iterate(limit):
+        if cancelled.is_set():
+            raise Cancelled()
+        if chunk:
+            parts.append(','.join(map(str, chunk)))
+    return ('{"result":[' + ','.join(parts) + ']}').encode()
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, status, payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def wants_ndjson(scope):
+    """True when the Accept header prefers NDJSON, as app.wants_stream decides."""
+    accept = dict(scope['headers']).get(b'accept', b'').decode('latin1')
+    return parse_accept_header(accept, MIMEAccept).best == NDJSON_MIMETYPE
+
+
+async def stream(receive, send, limit, classifier, deadline):
+    """Send a /numbers listing as NDJSON, one chunk at a time.
+
+    Each chunk is built in the thread pool. Past the deadline the response
+    is left incomplete, so the server drops the connection and the client
+    sees a truncated body rather than a short but valid one.
+    """
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline
+    lines = ndjson_lines(list_engine(classifier)[1](limit))
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', NDJSON_MIMETYPE.encode())],
+    })
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        while True:
+            work = loop.run_in_executor(executor, next, lines, None)
+            done, _ = await asyncio.wait({work, disconnect}, timeout=max(expires - loop.time(), 0),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if work not in done:
+                work.add_done_callback(lambda future: future.exception())
+                return
+            chunk = work.result()
+            if chunk is None:
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+    finally:
+        disconnect.cancel()
+
+
+async def numbers(scope, receive, send):
+    body = await read_body(receive)
+    if body is None:
+        return
+    try:
+        data = json.loads(body or b'{}')
+        limit = int(data.get('limit', 0))
+        classifier = lookup(data.get('choice', ''))
+        deadline = min(float(data.get('timeout', DEFAULT_DEADLINE)), MAX_DEADLINE)
+    except (AttributeError, TypeError, ValueError):
+        await send_json(send, 400, {'error': 'Invalid request body.'})
+        return
+    if data.get('op', 'list') != 'list' or any(field in data for field in UNSUPPORTED_FIELDS):
+        await send_json(send, 400, {'error': 'op, offset, page_size, cursor and format are '
+                                             'not supported in ASGI mode.'})
+        return
+    if classifier is None:
+        await send_json(send, 400, {'error': 'Invalid choice.'})
+        return
+    estimate = estimate_cost(classifier.code, limit)
+    if estimate.seconds > MAX_REQUEST_SECONDS:
+        await send_json(send, 413, {'error': 'Request too expensive; lower the limit.'})
+        return
+    # As in the Flask app, answers too big to buffer are streamed instead.
+    if data.get('stream') or wants_ndjson(scope) or estimate.memory_bytes > MAX_BUFFERED_BYTES:
+        await stream(receive, send, limit, classifier, deadline)
+        return
+
+    cancelled = threading.Event()
+    loop = asyncio.get_running_loop()
+    work = loop.run_in_executor(executor, generate, limit, classifier, cancelled)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        done, _ = await asyncio.wait({work, disconnect}, timeout=deadline,
+                                     return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+    if work in done:
+        await send_json(send, 200, work.result())
+        return
+    cancelled.set()
+    work.add_done_callback(lambda future: future.exception())
+    if disconnect not in done:
+        await send_json(send, 504, {'error': 'Deadline exceeded.'})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False, cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    path, method = scope['path'], scope['method']
+    if path == '/health' and method == 'GET':
+        await send_json(send, 200, {'status': 'ok'})
+    elif path == '/numbers' and method == 'POST':
+        await numbers(scope, receive, send)
+    elif path in ('/health', '/numbers'):
+        await send_json(send, 405, {'error': 'Method not allowed.'})
+    else:
+        await send_json(send, 404, {'error': 'Not found.'})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app)
@@ -0,0 +1,40 @@
+import random
+import sys
+import time
+
+from app import app
+
+# Usage: python bench_batch.py [queries] [max_limit]
+# Compares one /numbers/batch call against the same queries sent one by one.
+
+
+def make_queries(count, max_limit, seed=0):
+    rng = random.Random(seed)
+    return [{'limit': rng.randint(1, max_limit), 'choice': rng.choice('123')}
+            for _ in range(count)]
+
+
+def benchmark(count=500, max_limit=10_000, repeat=5):
+    client = app.test_client()
+    queries = make_queries(count, max_limit)
+    client.post('/numbers/batch', json={'queries': queries})
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            client.post('/numbers', json=query)
+    single = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.post('/numbers/batch', json={'queries': queries})
+    batch = (time.perf_counter() - start) / repeat
+
+    print(f"{count} queries, limits up to {max_limit:,}")
+    print(f"single calls: {single * 1000:9.2f} ms")
+    print(f"one batch:    {batch * 1000:9.2f} ms  ({single / batch:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 10_000)
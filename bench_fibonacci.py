@@ -0,0 +1,44 @@
+import random
+import sys
+import time
+
+from fibonacci import FibonacciCheckpoints, fib
+
+# Usage: python bench_fibonacci.py [index] [queries]
+# Times fast doubling from zero against the checkpoint memo for repeated
+# and nearby-index workloads around the given index.
+
+
+def workloads(index, queries, seed=0):
+    rng = random.Random(seed)
+    walk, n = [], index
+    for _ in range(queries):
+        n = max(0, n + rng.randint(-50, 50))
+        walk.append(n)
+    return {
+        'repeated': [index] * queries,
+        'nearby (random walk +/-50)': walk,
+        'ascending (+1000 steps)': [index + 1000 * i for i in range(queries)],
+        'scattered (uniform 0..2n)': [rng.randint(0, 2 * index) for _ in range(queries)],
+    }
+
+
+def timed(fn, indexes):
+    start = time.perf_counter()
+    for n in indexes:
+        fn(n)
+    return time.perf_counter() - start
+
+
+def benchmark(index=200_000, queries=200):
+    print(f"{queries} queries around F({index:,})")
+    print(f"{'workload':<28} {'from zero':>11} {'checkpoints':>12} {'speedup':>8}")
+    for name, indexes in workloads(index, queries).items():
+        cold = timed(fib, indexes)
+        warm = timed(FibonacciCheckpoints().fib, indexes)
+        print(f"{name:<28} {cold:>10.3f}s {warm:>11.3f}s {cold / warm:>7.1f}x")
+
+
+if __name__ == '__main__':
+    benchmark(int(float(sys.argv[1])) if len(sys.argv) > 1 else 200_000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 200)
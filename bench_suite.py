@@ -0,0 +1,222 @@
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import app
+from prime import is_prime
+from sieve import primes_up_to
+
+# Usage:
+#   python bench_suite.py run [--limits 1e3 1e4 ...] [--output FILE]
+#   python bench_suite.py compare BASELINE CURRENT [--threshold 0.1]
+#   python bench_suite.py stream [--limits 1e7 5e7] [--choice 1]
+# run writes a JSON baseline; compare exits with status 1 when any
+# operation got slower (p50) or hungrier (peak memory) than the threshold.
+# stream compares time to first byte and peak RSS of the NDJSON and the
+# buffered JSON /numbers responses.
+
+DEFAULT_LIMITS = [10 ** k for k in range(3, 9)]
+# Buffered answers above app.MAX_BUFFERED_BYTES are streamed anyway, so
+# keep the buffered side of the comparison below that.
+DEFAULT_STREAM_LIMITS = [10 ** 7, 5 * 10 ** 7]
+IS_PRIME_SAMPLE = 1000
+
+
+def _post(client, limit, choice):
+    app.response_cache.clear()
+    response = client.post('/numbers', json={'limit': limit, 'choice': choice})
+    assert response.status_code == 200
+    return response.data
+
+
+def operations(client):
+    """Map of operation name -> (callable taking limit, items it produces for limit)."""
+    return {
+        'is_prime': (lambda n: [is_prime(k) for k in range(max(n - IS_PRIME_SAMPLE, 0), n)],
+                     lambda n: min(n, IS_PRIME_SAMPLE)),
+        'sieve': (primes_up_to, lambda n: n),
+        'get_primes': (app.get_primes, lambda n: n),
+        'get_evens': (app.get_evens, lambda n: n // 2),
+        'get_odds': (app.get_odds, lambda n: (n + 1) // 2),
+        'numbers_primes': (lambda n: _post(client, n, '1'), lambda n: n),
+        'numbers_evens': (lambda n: _post(client, n, '2'), lambda n: n // 2),
+        'numbers_odds': (lambda n: _post(client, n, '3'), lambda n: (n + 1) // 2),
+    }
+
+
+def repeats_for(limit):
+    """Fewer repeats for bigger limits so the whole suite stays in minutes."""
+    return max(3, min(50, int(5e7 / limit)))
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+def measure(fn, limit, repeat):
+    """Return latencies in seconds for repeat calls, then peak traced memory in bytes."""
+    fn(limit)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(limit)
+        latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn(limit)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return latencies, peak
+
+
+def run(limits, ops=None):
+    client = app.app.test_client()
+    results = []
+    for name, (fn, items) in operations(client).items():
+        if ops and name not in ops:
+            continue
+        for limit in limits:
+            repeat = repeats_for(limit)
+            latencies, peak = measure(fn, limit, repeat)
+            p50 = percentile(latencies, 0.50)
+            results.append({
+                'op': name,
+                'limit': limit,
+                'repeat': repeat,
+                'p50_ms': p50 * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'throughput': items(limit) / p50 if p50 else None,
+                'peak_mb': peak / 2 ** 20,
+            })
+            row = results[-1]
+            print(f"{name:<15} {limit:>12,} p50 {row['p50_ms']:10.3f} ms  p99 {row['p99_ms']:10.3f} ms  "
+                  f"{row['throughput'] or 0:14,.0f} items/s  peak {row['peak_mb']:9.2f} MB",
+                  flush=True)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def _probe_response(limit, choice, stream, results):
+    """Child process: time one /numbers response and report its peak RSS.
+
+    Runs in a fresh process so ru_maxrss belongs to this response alone;
+    idle_mb is the RSS high-water mark before the request.
+    """
+    client = app.app.test_client()
+    client.post('/numbers', json={'limit': 10, 'choice': choice})
+    idle = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    response = client.post('/numbers', json={'limit': limit, 'choice': choice, 'stream': stream},
+                           buffered=False)
+    ttfb = None
+    size = 0
+    for chunk in response.response:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+    results.put({
+        'streamed': response.mimetype == app.NDJSON_MIMETYPE,
+        'ttfb_ms': (ttfb if ttfb is not None else total) * 1000,
+        'total_ms': total * 1000,
+        'bytes': size,
+        'idle_mb': idle / 1024,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def stream_report(limits, choice='1'):
+    """Measure the streamed and buffered /numbers responses for each limit."""
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for limit in limits:
+        for stream in (True, False):
+            results = context.Queue()
+            child = context.Process(target=_probe_response, args=(limit, choice, stream, results))
+            child.start()
+            row = {'limit': limit, 'choice': choice, 'mode': 'ndjson' if stream else 'json',
+                   **results.get()}
+            child.join()
+            rows.append(row)
+            print(f"{row['mode']:<7} {limit:>12,} ttfb {row['ttfb_ms']:10.1f} ms  "
+                  f"total {row['total_ms']:10.1f} ms  peak RSS {row['peak_rss_mb']:8.1f} MB "
+                  f"(idle {row['idle_mb']:.1f})  {row['bytes']:>12,} bytes"
+                  f"{'' if row['streamed'] == stream else '  (buffered request was streamed)'}",
+                  flush=True)
+    return rows
+
+
+def compare(baseline, current, threshold):
+    """Print per-operation changes and return the rows that regressed."""
+    before = {(r['op'], r['limit']): r for r in baseline['results']}
+    regressions = []
+    for row in current['results']:
+        old = before.get((row['op'], row['limit']))
+        if old is None:
+            continue
+        flags = [metric for metric in ('p50_ms', 'peak_mb')
+                 if old[metric] and row[metric] > old[metric] * (1 + threshold)]
+        change = row['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0.0
+        print(f"{row['op']:<15} {row['limit']:>12,} p50 {old['p50_ms']:10.3f} -> {row['p50_ms']:10.3f} ms "
+              f"({change:+.1%})  {'REGRESSION: ' + ', '.join(flags) if flags else 'ok'}")
+        if flags:
+            regressions.append((row, flags))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the number-classification hot paths.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the suite and save the results")
+    run_parser.add_argument('--limits', nargs='+', type=lambda s: int(float(s)), default=DEFAULT_LIMITS)
+    run_parser.add_argument('--ops', nargs='+', help="only run these operations")
+    run_parser.add_argument('--output', default='bench_results.json')
+    compare_parser = commands.add_parser('compare', help="flag regressions against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="allowed relative slowdown, e.g. 0.10 for 10%%")
+    stream_parser = commands.add_parser(
+        'stream', help="time to first byte and peak RSS, NDJSON vs buffered JSON")
+    stream_parser.add_argument('--limits', nargs='+', type=lambda s: int(float(s)),
+                               default=DEFAULT_STREAM_LIMITS)
+    stream_parser.add_argument('--choice', default='1')
+    stream_parser.add_argument('--output', help="also save the rows as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == 'stream':
+        rows = stream_report(args.limits, args.choice)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(rows, f, indent=2)
+        return 0
+    if args.command == 'run':
+        report = run(args.limits, args.ops)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(report['results'])} results to {args.output}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from even import even_range, is_even
+from odd import is_odd, odd_range
+from prime import is_prime
+from sieve import iter_prime_segments, primes_in_range, small_primes
+
+# scalar(n) answers for one number; mask(lo, hi) returns a bool array whose
+# i-th entry answers for lo + i, for 0 <= lo <= hi. range(limit), when set,
+# lists the matches in [1, limit] as a Python range.
+Classifier = namedtuple('Classifier', 'code name title scalar mask range')
+
+# Classifiers by name, in registration order; the order gives the menu codes.
+REGISTRY = {}
+# Integers evaluated at once by select and iter_select.
+WINDOW = 1 << 20
+
+
+def register(name, title, scalar, mask, range=None):
+    """Add a classifier; it gets the next menu code ('1', '2', ...)."""
+    REGISTRY[name] = Classifier(str(len(REGISTRY) + 1), name, title, scalar, mask, range)
+    return REGISTRY[name]
+
+
+def choices():
+    """Map of menu code to classifier name."""
+    return {classifier.code: name for name, classifier in REGISTRY.items()}
+
+
+def lookup(choice):
+    """Find a classifier by menu code ('1') or name ('prime'); None if unknown."""
+    choice = str(choice)
+    return REGISTRY.get(choices().get(choice, choice))
+
+
+def iter_select(names, lo, hi, window=WINDOW):
+    """Yield arrays of the numbers in [lo, hi] matching every named classifier."""
+    masks = [REGISTRY[name].mask for name in names]
+    for start in range(max(lo, 0), hi + 1, window):
+        stop = min(start + window - 1, hi)
+        flags = masks[0](start, stop)
+        for mask in masks[1:]:
+            flags &= mask(start, stop)
+        yield start + np.flatnonzero(flags).astype(np.int64)
+
+
+def select(names, lo, hi, window=WINDOW):
+    """Return an array of the numbers in [lo, hi] matching every named classifier."""
+    parts = list(iter_select(names, lo, hi, window))
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def count_matching(names, lo, hi, window=WINDOW):
+    """Count the numbers in [lo, hi] matching every named classifier."""
+    return sum(len(part) for part in iter_select(names, lo, hi, window))
+
+
+def prime_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    for segment in iter_prime_segments(lo, hi):
+        flags[segment - lo] = True
+    return flags
+
+
+def even_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    flags[lo % 2::2] = True
+    return flags
+
+
+def odd_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    flags[1 - lo % 2::2] = True
+    return flags
+
+
+def is_square(n):
+    """Check if a number is a perfect square."""
+    return n >= 0 and math.isqrt(n) ** 2 == n
+
+
+def square_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    first = math.isqrt(lo - 1) + 1 if lo > 0 else 0
+    roots = np.arange(first, math.isqrt(hi) + 1, dtype=np.int64)
+    flags[roots * roots - lo] = True
+    return flags
+
+
+def is_fibonacci(n):
+    """Check if a number is a Fibonacci number (5n^2 +/- 4 is a square)."""
+    return n >= 0 and (is_square(5 * n * n + 4) or is_square(5 * n * n - 4))
+
+
+def fibonacci_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    a, b = 0, 1
+    while a <= hi:
+        if a >= lo:
+            flags[a - lo] = True
+        a, b = b, a + b
+    return flags
+
+
+def is_semiprime(n):
+    """Check if a number is the product of exactly two primes."""
+    if n < 4:
+        return False
+    p = 2
+    while p * p <= n:
+        if n % p == 0:
+            return is_prime(n // p)
+        p += 1 if p == 2 else 2
+    return False
+
+
+def semiprime_mask(lo, hi):
+    flags = np.zeros(hi - lo + 1, dtype=bool)
+    for p in small_primes(math.isqrt(hi)).tolist():
+        q = primes_in_range(max(p, -(-lo // p)), hi // p)
+        flags[p * q - lo] = True
+    return flags
+
+
+register('prime', 'Prime Numbers', is_prime, prime_mask)
+register('even', 'Even Numbers', is_even, even_mask, even_range)
+register('odd', 'Odd Numbers', is_odd, odd_mask, odd_range)
+register('square', 'Perfect Squares', is_square, square_mask)
+register('fibonacci', 'Fibonacci Numbers', is_fibonacci, fibonacci_mask)
+register('semiprime', 'Semiprimes', is_semiprime, semiprime_mask)
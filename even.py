@@ -1,3 +1,30 @@
 def is_even(n):
     """Check if a number is even."""
     return n % 2 == 0
+
+
+def even_range(limit):
+    """Return the even numbers from 2 up to limit as a range."""
+    return range(2, limit + 1, 2)
+
+
+def count_evens(limit):
+    """Count the even numbers from 2 up to limit."""
+    return len(even_range(limit))
+
+
+def sum_evens(limit):
+    """Sum the even numbers from 2 up to limit (2 + 4 + ... + 2k)."""
+    k = count_evens(limit)
+    return k * (k + 1)
+
+
+def evens_slice(limit, start=None, stop=None):
+    """Return a slice of the evens up to limit as a range, without listing them."""
+    return even_range(limit)[start:stop]
+
+
+def evens_page(limit, page, page_size):
+    """Return the zero-based page of evens up to limit as a range."""
+    offset = page * page_size
+    return evens_slice(limit, offset, offset + page_size)
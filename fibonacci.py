@@ -0,0 +1,181 @@
+import bisect
+import threading
+from collections import OrderedDict
+from itertools import count, islice
+
+import numpy as np
+
+# From a checkpoint this close below n, plain additions beat the addition formula.
+STEP_THRESHOLD = 64
+DEFAULT_CHECKPOINT_BYTES = 32 << 20
+
+# Largest index whose Fibonacci number fits each dtype.
+MAX_INDEX = {np.dtype(np.int64): 92, np.dtype(np.uint64): 93, np.dtype(np.float64): 1476}
+
+
+def fib_pair(n, mod=None):
+    """Return (F(n), F(n+1)) by fast doubling, optionally reduced modulo mod.
+
+    Uses F(2k) = F(k) * (2F(k+1) - F(k)) and F(2k+1) = F(k)^2 + F(k+1)^2,
+    walking the bits of n from the top: O(log n) multiplications.
+    """
+    if n < 0:
+        raise ValueError('n must be non-negative.')
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+        if mod is not None:
+            a, b = a % mod, b % mod
+    return (a % mod, b % mod) if mod is not None else (a, b)
+
+
+def fib(n):
+    """Return the n-th Fibonacci number, F(0) = 0."""
+    return fib_pair(n)[0]
+
+
+def fib_mod(n, mod):
+    """Return F(n) mod mod, for n far too large to compute F(n) itself."""
+    if mod < 1:
+        raise ValueError('mod must be positive.')
+    return fib_pair(n, mod)[0]
+
+
+def iter_fibonacci(start=0, mod=None):
+    """Lazily yield F(start), F(start + 1), ..., optionally modulo mod."""
+    a, b = fib_pair(start, mod)
+    for _ in count():
+        yield a
+        a, b = b, (a + b) % mod if mod is not None else a + b
+
+
+def fibonacci_series(n, start=0):
+    """Return the list [F(start), ..., F(start + n - 1)]."""
+    return list(islice(iter_fibonacci(start), n))
+
+
+def fibonacci_array(n, start=0, dtype=np.int64):
+    """Return F(start) .. F(start + n - 1) as a NumPy array of dtype.
+
+    int64 holds up to F(92), uint64 up to F(93) and float64 (approximate)
+    up to F(1476); a ValueError is raised past that instead of overflowing.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in MAX_INDEX:
+        raise ValueError(f'dtype must be one of {", ".join(map(str, MAX_INDEX))}.')
+    if n > 0 and start + n - 1 > MAX_INDEX[dtype]:
+        raise ValueError(f'F({start + n - 1}) does not fit in {dtype}; '
+                         f'use fibonacci_series or iter_fibonacci instead.')
+    return np.array(fibonacci_series(max(n, 0), start), dtype=dtype)
+
+
+def to_decimal(n):
+    """Return str(n) for ints of any size.
+
+    Splits on powers of ten so that no single conversion hits Python's
+    int-to-str digit limit, and is sub-quadratic for huge values.
+    """
+    if n < 0:
+        return '-' + to_decimal(-n)
+    if n.bit_length() < 10000:
+        return str(n)
+    half = int(n.bit_length() * 0.30103) // 2
+    high, low = divmod(n, 10 ** half)
+    return to_decimal(high) + to_decimal(low).zfill(half)
+
+
+class FibonacciCheckpoints:
+    """Bounded memo of (F(k), F(k+1)) pairs that later queries start from.
+
+    pair(n) starts from a checkpoint k. If one lies just above n it steps
+    back with F(k-1) = F(k+1) - F(k). Otherwise it takes the closest k <= n
+    and moves forward: by plain additions when n - k is small, else with
+    F(k+m) = F(k)F(m+1) + F(k-1)F(m), where F(m) and F(m+1) are small.
+    Every answered pair becomes a checkpoint. The least recently used ones
+    are dropped once the stored integers exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CHECKPOINT_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._keys = []
+        self._pairs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _nearest(self, n):
+        """Return the checkpoint to start from for n as (k, pair), or None."""
+        with self._lock:
+            i = bisect.bisect_right(self._keys, n)
+            if i < len(self._keys) and self._keys[i] - n <= STEP_THRESHOLD:
+                k = self._keys[i]
+            elif i:
+                k = self._keys[i - 1]
+            else:
+                return None
+            self._pairs.move_to_end(k)
+            return k, self._pairs[k]
+
+    def _store(self, n, pair):
+        size = (pair[0].bit_length() + pair[1].bit_length()) // 8 + 64
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if n in self._pairs:
+                return
+            bisect.insort(self._keys, n)
+            self._pairs[n] = pair
+            self.size += size
+            while self.size > self.max_bytes:
+                k, (a, b) = self._pairs.popitem(last=False)
+                self._keys.pop(bisect.bisect_left(self._keys, k))
+                self.size -= (a.bit_length() + b.bit_length()) // 8 + 64
+
+    def pair(self, n):
+        """Return (F(n), F(n+1))."""
+        nearest = self._nearest(n)
+        hit = nearest is not None and n // 2 <= nearest[0] <= n + STEP_THRESHOLD
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not hit:
+            a, b = fib_pair(n)
+        else:
+            k, (a, b) = nearest
+            m = n - k
+            if m < 0:
+                for _ in range(-m):
+                    a, b = b - a, a
+            elif m <= STEP_THRESHOLD:
+                for _ in range(m):
+                    a, b = b, a + b
+            else:
+                fm, fm1 = fib_pair(m)
+                a, b = a * fm1 + (b - a) * fm, b * fm1 + a * fm
+        self._store(n, (a, b))
+        return a, b
+
+    def fib(self, n):
+        """Return F(n)."""
+        return self.pair(n)[0]
+
+    def series(self, start, stop):
+        """Return [F(start), ..., F(stop)], starting from the nearest checkpoint."""
+        a, b = self.pair(start)
+        result = []
+        for _ in range(start, stop + 1):
+            result.append(a)
+            a, b = b, a + b
+        if stop >= start:
+            self._store(stop + 1, (a, b))
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'checkpoints': len(self._keys), 'bytes': self.size,
+                    'hits': self.hits, 'misses': self.misses}
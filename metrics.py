@@ -0,0 +1,158 @@
+import bisect
+import cProfile
+import heapq
+import io
+import itertools
+import pstats
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(4 ** k for k in range(4, 16))
+
+
+def _escape(value):
+    """Escape a label value as the Prometheus text format requires."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Base for metrics kept per label combination."""
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            for values, value in sorted(self._values.items()):
+                lines.extend(self._render_one(values, value))
+        return lines
+
+    def _render_one(self, values, value):
+        return [f'{self.name}{_labels(self.label_names, values)} {value}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        labels = tuple(map(str, labels))
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, labels=(), amount=1):
+        labels = tuple(map(str, labels))
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[tuple(map(str, labels))] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        labels = tuple(map(str, labels))
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def _render_one(self, values, value):
+        counts, total = value
+        names = self.label_names + ('le',)
+        lines = []
+        for bound, cumulative in zip(self.buckets + ('+Inf',), itertools.accumulate(counts)):
+            lines.append(f'{self.name}_bucket{_labels(names, values + (bound,))} {cumulative}')
+        lines.append(f'{self.name}_sum{_labels(self.label_names, values)} {total}')
+        lines.append(f'{self.name}_count{_labels(self.label_names, values)} {sum(counts)}')
+        return lines
+
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+class SlowestRequests:
+    """Profile a sample of requests and keep the slowest `size` of them.
+
+    Each kept entry has the request's duration, its parameters and the top
+    functions by cumulative time from cProfile.
+    """
+
+    def __init__(self, size, sample_every=1, top_functions=15):
+        self.size = size
+        self.sample_every = max(1, sample_every)
+        self.top_functions = top_functions
+        self._seen = itertools.count()
+        self._order = itertools.count()
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Return a running profiler if this request is sampled, else None."""
+        if next(self._seen) % self.sample_every:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            return None
+        return profiler
+
+    def finish(self, profiler, duration, params):
+        profiler.disable()
+        with self._lock:
+            if len(self._heap) >= self.size and duration <= self._heap[0][0]:
+                return
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top_functions)
+        entry = (duration, next(self._order), {'duration': duration, 'params': params,
+                                               'profile': out.getvalue()})
+        with self._lock:
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, entry)
+            else:
+                heapq.heappushpop(self._heap, entry)
+
+    def entries(self):
+        """Slowest first."""
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, reverse=True)]
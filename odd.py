@@ -1,3 +1,30 @@
 def is_odd(n):
     """Check if a number is odd."""
     return n % 2 != 0
+
+
+def odd_range(limit):
+    """Return the odd numbers from 1 up to limit as a range."""
+    return range(1, limit + 1, 2)
+
+
+def count_odds(limit):
+    """Count the odd numbers from 1 up to limit."""
+    return len(odd_range(limit))
+
+
+def sum_odds(limit):
+    """Sum the odd numbers from 1 up to limit (1 + 3 + ... + (2k - 1))."""
+    k = count_odds(limit)
+    return k * k
+
+
+def odds_slice(limit, start=None, stop=None):
+    """Return a slice of the odds up to limit as a range, without listing them."""
+    return odd_range(limit)[start:stop]
+
+
+def odds_page(limit, page, page_size):
+    """Return the zero-based page of odds up to limit as a range."""
+    offset = page * page_size
+    return odds_slice(limit, offset, offset + page_size)
@@ -0,0 +1,53 @@
+import base64
+import json
+import math
+
+from prime_count import nth_prime, nth_prime_lower_bound
+from sieve import primes_in_range
+
+
+def encode_cursor(state):
+    """Pack the state of a paged query into an opaque URL-safe token."""
+    raw = json.dumps(state, separators=(',', ':'), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a token made by encode_cursor; raise ValueError if it is not one."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        state = json.loads(raw)
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+    if not isinstance(state, dict):
+        raise ValueError('Invalid cursor.')
+    return state
+
+
+def prime_window(limit, offset, size, after=None):
+    """Return up to size primes <= limit, starting with the prime at index offset.
+
+    Without after, the window starts exactly at nth_prime(offset + 1). With
+    after (the last prime of the previous page) it starts right past it.
+    Only the window is sieved, so the base primes go up to the square root
+    of its end rather than of limit.
+    """
+    if after is None:
+        if nth_prime_lower_bound(offset + 1) > limit:
+            return []
+        lo = nth_prime(offset + 1)
+    else:
+        lo = after + 1
+    # Enough numbers for size primes near lo, by the prime number theorem.
+    width = max(4096, int(size * math.log(max(lo, 3)) * 1.25))
+    window = []
+    while len(window) < size and lo <= limit:
+        hi = min(limit, lo + width - 1)
+        window.extend(primes_in_range(lo, hi)[:size - len(window)].tolist())
+        lo = hi + 1
+    return window
+
+
+def range_window(numbers, offset, size):
+    """Return the window of a range as a list, by index arithmetic only."""
+    return list(numbers[offset:offset + size])
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from sieve import bytes_for, odd_prime_bits, primes_from_bits
+
+# Packed bytes handed to one task; 1 << 17 bytes cover about two million integers.
+SEGMENT_BYTES = 1 << 17
+
+
+def default_workers():
+    """Worker count from PRIME_WORKERS, else one per CPU."""
+    return int(os.environ.get('PRIME_WORKERS', 0)) or os.cpu_count() or 1
+
+
+def _sieve_into(shm_name, lo_byte, seg_lo, seg_hi):
+    """Worker task: write the flags for bytes [seg_lo, seg_hi) into shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((shm.size,), dtype=np.uint8, buffer=shm.buf)
+        out[seg_lo - lo_byte:seg_hi - lo_byte] = odd_prime_bits(seg_lo, seg_hi)
+        del out
+    finally:
+        shm.close()
+
+
+def sieve_bits(lo_byte, hi_byte, workers=None, segment_bytes=SEGMENT_BYTES):
+    """Return the packed prime flags for the bytes [lo_byte, hi_byte).
+
+    The range is cut into segments of segment_bytes. With more than one
+    worker and more than one segment, the segments are sieved in a process
+    pool and each worker writes its flags straight into a shared-memory
+    buffer at the segment's offset, so merging needs no copying or sorting.
+    """
+    workers = workers or default_workers()
+    bounds = [(lo, min(lo + segment_bytes, hi_byte))
+              for lo in range(lo_byte, hi_byte, segment_bytes)]
+    if workers == 1 or len(bounds) <= 1:
+        out = np.empty(max(hi_byte - lo_byte, 0), dtype=np.uint8)
+        for lo, hi in bounds:
+            out[lo - lo_byte:hi - lo_byte] = odd_prime_bits(lo, hi)
+        return out
+    shm = shared_memory.SharedMemory(create=True, size=hi_byte - lo_byte)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tasks = [pool.submit(_sieve_into, shm.name, lo_byte, lo, hi) for lo, hi in bounds]
+            for task in tasks:
+                task.result()
+        return np.ndarray((hi_byte - lo_byte,), dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def parallel_primes(limit, workers=None, segment_bytes=SEGMENT_BYTES):
+    """Return an array of all primes up to limit, sieved by several processes."""
+    if limit < 2:
+        return np.empty(0, dtype=np.int64)
+    odd_primes = primes_from_bits(sieve_bits(0, bytes_for(limit), workers, segment_bytes))
+    return np.concatenate([[2], odd_primes[odd_primes <= limit]])
+
+
+def benchmark(limit, max_workers=None):
+    """Time parallel_primes(limit) with 1..max_workers workers and print the speedup."""
+    max_workers = max_workers or default_workers()
+    baseline = None
+    print(f"Sieving up to {limit:,}")
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8}")
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        parallel_primes(limit, workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>9.3f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    # Usage: python parallel_sieve.py [limit] [max_workers]
+    benchmark(int(float(sys.argv[1])) if len(sys.argv) > 1 else 10 ** 9,
+              int(sys.argv[2]) if len(sys.argv) > 2 else None)
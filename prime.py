@@ -1,8 +1,50 @@
-def is_prime(n):
-    """Check if a number is prime."""
+import random
+
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53,
+                59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+# Bases that make Miller-Rabin exact for every n < 2**64 (Sinclair, 2011).
+DETERMINISTIC_BASES = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+
+def _is_strong_probable_prime(n, d, s, a):
+    """Run a single Miller-Rabin round for n - 1 = d * 2**s with base a."""
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def is_prime(n, probabilistic=False, rounds=20):
+    """Check if a number is prime.
+
+    Inputs below 2**64 are answered exactly. Larger inputs use the same
+    fixed bases unless probabilistic is set, in which case rounds random
+    bases are tried as well.
+    """
     if n <= 1:
         return False
-    for i in range(2, int(n ** 0.5) + 1):
-        if n % i == 0:
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < SMALL_PRIMES[-1] ** 2:
+        return True
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in DETERMINISTIC_BASES:
+        a %= n
+        if a and not _is_strong_probable_prime(n, d, s, a):
+            return False
+    if n < 1 << 64 or not probabilistic:
+        return True
+    for _ in range(rounds):
+        if not _is_strong_probable_prime(n, d, s, random.randrange(2, n - 1)):
             return False
     return True
+
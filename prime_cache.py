@@ -0,0 +1,149 @@
+import fcntl
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from parallel_sieve import sieve_bits
+from sieve import NUMBERS_PER_BYTE, bytes_for, primes_from_bits, primes_in_range
+
+DEFAULT_MAX_BYTES = 64 << 20
+# A table file starts with this magic and the largest number its bits cover;
+# the bits follow.
+MAGIC = b'PRIMEBIT'
+HEADER = struct.Struct('<8sQ')
+
+
+class PrimeTable:
+    """Grow-only bit table of primes shared by every request in the process.
+
+    Limits at or below the high-water mark are answered by slicing the table.
+    Larger limits extend it, at least doubling its size, until max_bytes is
+    reached; anything past the cap is sieved on demand and not kept. When
+    path is given the table is kept in a memory-mapped file and reloaded on
+    start-up. Extensions are sieved by up to `workers` processes.
+
+    Several processes may share one path: the file is only changed under an
+    exclusive lock on path + '.lock', extensions are appended from the size
+    recorded in the file rather than this process's copy, and evictions
+    replace the file so other processes' mappings stay valid.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None, workers=1):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._bits = np.zeros(0, dtype=np.uint8)
+        if path:
+            with self._file_lock(fcntl.LOCK_SH):
+                self._bits = self._load()
+        self.evict(max_bytes)
+
+    @property
+    def high_water(self):
+        """Largest number whose primality the table already holds."""
+        return len(self._bits) * NUMBERS_PER_BYTE - 1
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    def primes(self, limit):
+        """Return an array of all primes up to and including limit."""
+        if limit < 2:
+            return np.empty(0, dtype=np.int64)
+        if limit > self.high_water:
+            self.extend(limit)
+        bits = self._bits
+        cached = min(limit, len(bits) * NUMBERS_PER_BYTE - 1)
+        if cached < 2:
+            return primes_in_range(2, limit)
+        odd_primes = primes_from_bits(bits[:bytes_for(cached)])
+        parts = [np.array([2], dtype=np.int64), odd_primes[odd_primes <= cached]]
+        if cached < limit:
+            parts.append(primes_in_range(cached + 1, limit))
+        return np.concatenate(parts)
+
+    def extend(self, limit):
+        """Grow the table to cover limit, as far as max_bytes allows."""
+        with self._lock:
+            if not self.path:
+                old = len(self._bits)
+                new = min(max(bytes_for(limit), 2 * old), self.max_bytes)
+                if new > old:
+                    self._bits = np.concatenate([self._bits, sieve_bits(old, new, self.workers)])
+                return
+            with self._file_lock(fcntl.LOCK_EX):
+                # Another process may have grown (or replaced) the file since
+                # this one mapped it; start from what is there now.
+                self._bits = self._load()
+                old = len(self._bits)
+                new = min(max(bytes_for(limit), 2 * old), self.max_bytes)
+                if new <= old:
+                    return
+                chunk = sieve_bits(old, new, self.workers)
+                if old == 0:
+                    self._replace(chunk)
+                else:
+                    with open(self.path, 'r+b') as f:
+                        f.seek(HEADER.size + old)
+                        f.write(chunk.tobytes())
+                        # Only claim the new bits once they are written.
+                        f.seek(0)
+                        f.write(HEADER.pack(MAGIC, new * NUMBERS_PER_BYTE - 1))
+                self._bits = self._load()
+
+    def evict(self, max_bytes):
+        """Lower the memory cap, dropping the top of the table if it is over."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            if len(self._bits) <= max_bytes:
+                return
+            self._bits = np.array(self._bits[:max_bytes])
+            if self.path:
+                with self._file_lock(fcntl.LOCK_EX):
+                    if len(self._load()) > max_bytes:
+                        self._replace(self._bits)
+
+    @contextmanager
+    def _file_lock(self, operation):
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Map the table file; empty if it is missing or its length does not
+        match the limit in its header."""
+        try:
+            size = os.path.getsize(self.path)
+            with open(self.path, 'rb') as f:
+                magic, limit = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return np.zeros(0, dtype=np.uint8)
+        nbytes = (limit + 1) // NUMBERS_PER_BYTE
+        if (magic != MAGIC or (limit + 1) % NUMBERS_PER_BYTE
+                or size != HEADER.size + nbytes or nbytes == 0):
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(self.path, dtype=np.uint8, mode='r', offset=HEADER.size, shape=(nbytes,))
+
+    def _replace(self, bits):
+        """Write bits to a new table file and swap it in for the old one."""
+        if not len(bits):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(bits) * NUMBERS_PER_BYTE - 1))
+            f.write(np.asarray(bits).tobytes())
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        """Drop the whole table."""
+        self.evict(0)
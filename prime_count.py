@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+from sieve import primes_in_range, small_primes
+
+SMALL_NTH_PRIMES = (2, 3, 5, 7, 11, 13)
+# Primes nth_prime is willing to walk past with the sieve; further off, a
+# second prime_pi is cheaper.
+NTH_PRIME_MAX_WALK = 1 << 16
+
+
+def prime_pi(x):
+    """Count the primes up to x in about O(x**0.75) work.
+
+    This is the Meissel-Lehmer style recurrence on the values floor(x / k)
+    (Lucy Hedgehog's formulation): S(v) starts as the count of 2..v and
+    each prime p removes the numbers whose smallest prime factor is p.
+    Only the O(sqrt(x)) distinct values of floor(x / k) are tracked:
+    small[v] holds S(v) for v <= sqrt(x), and large[i] holds S(x // i).
+    """
+    if x < 2:
+        return 0
+    r = math.isqrt(x)
+    small = np.arange(-1, r, dtype=np.int64)
+    small[0] = 0
+    quotients = x // np.arange(1, r + 1, dtype=np.int64)
+    large = np.empty(r + 1, dtype=np.int64)
+    large[1:] = quotients - 1
+    for p in small_primes(r).tolist():
+        below = small[p - 1]
+        p2 = p * p
+        top = min(r, x // p2)
+        # For i <= r // p, floor(x / (i*p)) is large[i*p]: a strided slice.
+        inner = min(top, r // p)
+        large[1:inner + 1] -= large[p:inner * p + 1:p] - below
+        # Past that it is at most sqrt(x) and lives in small.
+        if top > inner:
+            large[inner + 1:top + 1] -= small[quotients[inner:top] // p] - below
+        if p2 <= r:
+            # small[v // p] for v = p*p..r is each small[q] repeated p times.
+            small[p2:] -= np.repeat(small[p:r // p + 1], p)[:r + 1 - p2] - below
+    return int(large[1])
+
+
+def nth_prime_lower_bound(n):
+    """Return a number no larger than the n-th prime (Dusart, n >= 2)."""
+    if n < 6:
+        return 2
+    log_n = math.log(n)
+    return max(2, int(n * (log_n + math.log(log_n) - 1)))
+
+
+def nth_prime_estimate(n):
+    """Cipolla's asymptotic estimate of the n-th prime."""
+    if n < 6:
+        return SMALL_NTH_PRIMES[n - 1]
+    log_n = math.log(n)
+    log_log_n = math.log(log_n)
+    return int(n * (log_n + log_log_n - 1 + (log_log_n - 2) / log_n))
+
+
+def nth_prime(n):
+    """Return the n-th prime (nth_prime(1) == 2).
+
+    prime_pi is evaluated at an estimate of the answer and, when that is
+    far off, once more at the estimate corrected by the prime density
+    there; the sieve then walks forwards or backwards to the exact prime.
+    """
+    if n < 1:
+        raise ValueError('n must be at least 1.')
+    if n <= len(SMALL_NTH_PRIMES):
+        return SMALL_NTH_PRIMES[n - 1]
+    x = nth_prime_estimate(n)
+    count = prime_pi(x)
+    if abs(count - n) > NTH_PRIME_MAX_WALK:
+        x += int((n - count) * math.log(x))
+        count = prime_pi(x)
+    width = max(1 << 16, int(abs(count - n) * math.log(x) * 1.25))
+    if count < n:
+        missing, lo = n - count, x + 1
+        while True:
+            primes = primes_in_range(lo, lo + width - 1)
+            if len(primes) >= missing:
+                return int(primes[missing - 1])
+            missing -= len(primes)
+            lo += width
+    extra, hi = count - n, x
+    while True:
+        primes = primes_in_range(max(hi - width + 1, 2), hi)
+        if len(primes) > extra:
+            return int(primes[len(primes) - 1 - extra])
+        extra -= len(primes)
+        hi -= width
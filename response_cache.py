@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 << 20
+# Bump when the response format changes so clients drop their old ETags.
+RESPONSE_VERSION = '1'
+
+
+def response_etag(key):
+    """Strong ETag for a normalised request key; needs no computation."""
+    return hashlib.sha256(f'{RESPONSE_VERSION}:{key!r}'.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """LRU cache of serialised response bodies, bounded by their total size.
+
+    Bodies larger than max_entry_bytes are never cached so that one huge
+    response cannot flush everything else.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached body for key, or None."""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        """Cache body under key, evicting least recently used entries to fit."""
+        if len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Drop every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size,
+                    'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+# Odd numbers covered by one segment. The working set of a segment is this
+# flag array plus the base primes up to sqrt(limit).
+SEGMENT_SIZE = 1 << 20
+
+# Packed layout shared by the prime table and the parallel sieve: every byte
+# holds the prime flags of 8 odd numbers, i.e. it covers 16 consecutive
+# integers, and bit i (little-endian) is the flag for 2*i + 1.
+NUMBERS_PER_BYTE = 16
+
+
+def small_primes(n):
+    """Return all primes up to n with a plain (non-segmented) sieve."""
+    if n < 2:
+        return np.empty(0, dtype=np.int64)
+    flags = np.ones(n + 1, dtype=bool)
+    flags[:2] = False
+    flags[4::2] = False
+    for p in range(3, math.isqrt(n) + 1, 2):
+        if flags[p]:
+            flags[p * p::2 * p] = False
+    return np.flatnonzero(flags).astype(np.int64)
+
+
+def iter_prime_segments(lo, hi, segment_size=SEGMENT_SIZE):
+    """Yield arrays of the primes in [lo, hi], one segment at a time."""
+    lo = max(lo, 2)
+    if hi < lo:
+        return
+    if lo == 2:
+        yield np.array([2], dtype=np.int64)
+        lo = 3
+    if lo % 2 == 0:
+        lo += 1
+    if hi < lo:
+        return
+    base = small_primes(math.isqrt(hi))[1:].tolist()
+    span = 2 * max(segment_size, math.isqrt(hi) // 2 + 1)
+    for start in range(lo, hi + 1, span):
+        stop = min(start + span - 2, hi)
+        flags = np.ones((stop - start) // 2 + 1, dtype=bool)
+        for p in base:
+            if p * p > stop:
+                break
+            first = max(p * p, -(-start // p) * p)
+            if first % 2 == 0:
+                first += p
+            if first <= stop:
+                flags[(first - start) // 2::p] = False
+        yield start + 2 * np.flatnonzero(flags).astype(np.int64)
+
+
+def primes_in_range(lo, hi, segment_size=SEGMENT_SIZE):
+    """Return an array of the primes in [lo, hi]."""
+    segments = list(iter_prime_segments(lo, hi, segment_size))
+    if not segments:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(segments)
+
+
+def primes_up_to(limit, segment_size=SEGMENT_SIZE):
+    """Return an array of all primes up to and including limit."""
+    return primes_in_range(2, limit, segment_size)
+
+
+def bytes_for(limit):
+    """Number of packed bytes needed to cover every integer up to limit."""
+    return (limit + NUMBERS_PER_BYTE) // NUMBERS_PER_BYTE
+
+
+def odd_prime_bits(lo_byte, hi_byte):
+    """Return the packed prime flags for the bytes [lo_byte, hi_byte)."""
+    lo = lo_byte * NUMBERS_PER_BYTE
+    hi = hi_byte * NUMBERS_PER_BYTE - 1
+    flags = np.zeros((hi - lo + 1) // 2, dtype=bool)
+    flags[(primes_in_range(max(lo, 3), hi) - lo - 1) // 2] = True
+    return np.packbits(flags, bitorder='little')
+
+
+def primes_from_bits(bits, lo_byte=0):
+    """Decode packed prime flags into an array of the odd primes they mark."""
+    flags = np.unpackbits(bits, bitorder='little')
+    return lo_byte * NUMBERS_PER_BYTE + 2 * np.flatnonzero(flags).astype(np.int64) + 1
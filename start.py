@@ -1,46 +1,138 @@
-from prime import is_prime
-from even import is_even
-from odd import is_odd
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from classifiers import REGISTRY, choices, count_matching, iter_select, lookup
+from parallel_sieve import parallel_primes
+from prime_count import prime_pi
+from sieve import iter_prime_segments
+
+def print_numbers(limit, classifier):
+    """Print all numbers up to the given limit that match a classifier."""
+    print(f"{classifier.title.capitalize()} up to {limit}:")
+    blocks = [parallel_primes(limit)] if classifier.name == 'prime' else iter_blocks(limit, classifier.code)
+    for block in blocks:
+        if len(block):
+            print(' '.join(map(str, block.tolist())), end=' ')
+    print()
 
 def print_primes(limit):
     """Print all prime numbers up to the given limit."""
-    print(f"Prime numbers up to {limit}:")
-    for num in range(2, limit + 1):
-        if is_prime(num):
-            print(num, end=' ')
-    print()
+    print_numbers(limit, REGISTRY['prime'])
 
 def print_evens(limit):
     """Print all even numbers up to the given limit."""
-    print(f"Even numbers up to {limit}:")
-    for num in range(2, limit + 1):
-        if is_even(num):
-            print(num, end=' ')
-    print()
+    print_numbers(limit, REGISTRY['even'])
 
 def print_odds(limit):
     """Print all odd numbers up to the given limit."""
-    print(f"Odd numbers up to {limit}:")
-    for num in range(1, limit + 1):
-        if is_odd(num):
-            print(num, end=' ')
-    print()
+    print_numbers(limit, REGISTRY['odd'])
+
+# Numbers per block written in non-interactive mode.
+BLOCK_SIZE = 1 << 18
+BINARY_DTYPES = {'u32': '<u4', 'u64': '<u8'}
+
+def iter_blocks(limit, choice, block_size=BLOCK_SIZE):
+    """Yield the requested numbers up to limit as int64 arrays, block by block."""
+    classifier = lookup(choice)
+    if classifier.name == 'prime':
+        yield from iter_prime_segments(2, limit)
+    elif classifier.range is not None:
+        numbers = classifier.range(limit)
+        for i in range(0, len(numbers), block_size):
+            block = numbers[i:i + block_size]
+            yield np.arange(block.start, block.stop, block.step, dtype=np.int64)
+    else:
+        yield from iter_select([classifier.name], 1, limit, block_size)
+
+def count_numbers(limit, choice):
+    """Count what iter_blocks(limit, choice) yields without listing it."""
+    classifier = lookup(choice)
+    if classifier.name == 'prime':
+        return prime_pi(limit)
+    if classifier.range is not None:
+        return len(classifier.range(limit))
+    return count_matching([classifier.name], 1, limit)
+
+def write_npy(blocks, out, count):
+    """Stream blocks into a .npy file of count int64s, header first."""
+    np.lib.format.write_array_header_1_0(
+        out, {'descr': '<i8', 'fortran_order': False, 'shape': (count,)})
+    written = 0
+    for block in blocks:
+        out.write(block.astype('<i8').tobytes())
+        written += len(block)
+    if written != count:
+        raise ValueError(f"Wrote {written} numbers but the .npy header says {count}.")
+
+def write_numbers(blocks, out, fmt='text', count=None):
+    """Write blocks of numbers to a binary stream as text lines, raw integers or .npy.
+
+    The .npy format needs the count up front (see count_numbers).
+    """
+    if fmt == 'npy':
+        write_npy(blocks, out, count)
+        return
+    for block in blocks:
+        if not len(block):
+            continue
+        if fmt == 'text':
+            out.write(('\n'.join(map(str, block.tolist())) + '\n').encode())
+        else:
+            if fmt == 'u32' and block[-1] >= 1 << 32:
+                raise ValueError("Numbers do not fit in u32; use --format u64.")
+            out.write(block.astype(BINARY_DTYPES[fmt]).tobytes())
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print primes, evens, odds or other classified numbers up to a limit. "
+                    "Without arguments the limit and choice are asked for interactively.")
+    parser.add_argument('limit', nargs='?', type=int, help="upper limit (inclusive)")
+    parser.add_argument('choice', nargs='?', choices=list(choices()),
+                        help=', '.join(f"{code} = {name}" for code, name in choices().items()))
+    parser.add_argument('-o', '--output', help="write to this file instead of stdout")
+    parser.add_argument('-f', '--format', default='text', choices=['text', 'u32', 'u64', 'npy'],
+                        help="one number per line, raw little-endian integers, or a NumPy .npy file")
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.choice is None:
+        parser.error("choice is required when limit is given")
+    return args
+
+def main(args):
+    """Write the numbers for the parsed arguments in large blocks."""
+    blocks = iter_blocks(args.limit, args.choice)
+    count = count_numbers(args.limit, args.choice) if args.format == 'npy' else None
+    if args.output:
+        with open(args.output, 'wb', buffering=1 << 20) as out:
+            write_numbers(blocks, out, args.format, count)
+    else:
+        write_numbers(blocks, sys.stdout.buffer, args.format, count)
+        sys.stdout.buffer.flush()
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.limit is not None:
+        try:
+            main(args)
+        except ValueError as exc:
+            sys.exit(str(exc))
+        except BrokenPipeError:
+            # The reader (e.g. head) has gone; point stdout at devnull so the
+            # final flush at exit cannot fail again, and stop quietly.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit()
     # The user is prompted to enter the upper limit for finding numbers.
     limit = int(input("Enter the upper limit: "))
     # The user is prompted to choose which type of numbers to print.
     print("Choose an option:")
-    print("1. Print Prime Numbers")
-    print("2. Print Even Numbers")
-    print("3. Print Odd Numbers")
-    choice = input("Enter your choice (1/2/3): ")
-
-    if choice == '1':
-        print_primes(limit)
-    elif choice == '2':
-        print_evens(limit)
-    elif choice == '3':
-        print_odds(limit)
+    for code, name in choices().items():
+        print(f"{code}. Print {REGISTRY[name].title}")
+    choice = input(f"Enter your choice ({'/'.join(choices())}): ")
+
+    classifier = lookup(choice)
+    if classifier is None:
+        print("Invalid choice.")
     else:
-        print("Invalid choice.")
\ No newline at end of file
+        print_numbers(limit, classifier)
\ No newline at end of file